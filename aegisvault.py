@@ -0,0 +1,488 @@
+# AegisVault command-line interface.
+#
+# Kept free of Qt, and cryptography is only loaded by commands that read or
+# write a secret, so generating passwords starts fast. Application names and
+# usernames are stored sealed: listing decrypts only them, and searching
+# (by text or by website URL) decrypts only the entries whose blind-index
+# tokens match.
+import os
+import sys
+import json
+import getpass
+import argparse
+
+import logic
+
+
+# ------------------ Helpers ------------------
+
+def _print_json(value):
+    json.dump(value, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def _public(entry):
+    return {
+        "id": logic.entry_id(entry),
+        "app_name": entry["app_name"],
+        "username": entry["username"],
+        "vault": entry["vault"],
+        "date_added": entry.get("date_added", ""),
+        "urls": entry.get("urls", []),
+    }
+
+
+def _print_table(entries):
+    if not entries:
+        print("No entries found.")
+        return
+    width_app = max(len("Application"), *(len(e["app_name"]) for e in entries))
+    width_user = max(len("Username"), *(len(e["username"]) for e in entries))
+    print(f"{'Application':<{width_app}}  {'Username':<{width_user}}  Vault")
+    for e in entries:
+        print(f"{e['app_name']:<{width_app}}  {e['username']:<{width_user}}  {e['vault']}")
+
+
+# ------------------ Commands ------------------
+
+def cmd_ls(args):
+    # With --vault only that vault's shard is read; passwords stay encrypted.
+    entries = logic.decrypt_entries(logic.load_vault(args.vault), passwords=False)
+    if args.json:
+        _print_json([_public(e) for e in entries])
+    else:
+        _print_table(entries)
+    return 0
+
+
+def cmd_search(args):
+    entries = logic.find_entries(args.text)
+    if args.json:
+        _print_json([_public(e) for e in entries])
+    else:
+        _print_table(entries)
+    return 0
+
+
+def cmd_get(args):
+    entries = [
+        e for e in logic.find_entries(args.app_name, field="app_name", exact=True)
+        if args.username is None or e["username"] == args.username
+    ]
+    if not entries:
+        print(f"No entry for '{args.app_name}'.", file=sys.stderr)
+        return 1
+    # Only the matching entries are decrypted.
+    results = [dict(_public(e), password=logic.decrypt(e["password"])) for e in entries]
+    if args.json:
+        _print_json(results)
+    elif len(results) == 1:
+        print(results[0]["password"])
+    else:
+        print(f"Several entries for '{args.app_name}', pick one with --username:", file=sys.stderr)
+        _print_table(results)
+        return 1
+    return 0
+
+
+def cmd_url(args):
+    # Only the entries saved for the URL's site are decrypted.
+    try:
+        entries = logic.find_by_url(args.url, related=not args.host_only)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not entries:
+        print(f"No entry for '{args.url}'.", file=sys.stderr)
+        return 1
+    if args.password:
+        # The best match, ready for a quick-fill binding: aegisvault url "$URL" --password | xclip
+        print(logic.decrypt(entries[0]["password"]))
+    elif args.json:
+        _print_json([_public(e) for e in entries])
+    else:
+        _print_table(entries)
+    return 0
+
+
+def _read_stdin_rows(vault):
+    # One JSON object per line, or tab-separated app, username, password[, vault].
+    rows = []
+    for number, line in enumerate(sys.stdin, 1):
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("{"):
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {number}: {e}") from None
+            missing = [key for key in ("app_name", "username", "password")
+                       if not isinstance(row.get(key), str) or not row[key]]
+            if missing:
+                raise ValueError(f"Line {number}: missing {', '.join(missing)}.")
+        else:
+            fields = line.split("\t")
+            if len(fields) < 3:
+                raise ValueError(f"Line {number}: expected app, username and password separated by tabs.")
+            row = {"app_name": fields[0], "username": fields[1], "password": fields[2]}
+            if len(fields) > 3:
+                row["vault"] = fields[3]
+        row.setdefault("vault", vault)
+        rows.append(row)
+    return rows
+
+
+def _read_password():
+    # Keeps the secret off argv: prompted for on a terminal, else one line of stdin.
+    if sys.stdin.isatty():
+        password = getpass.getpass("Password: ")
+        if password != getpass.getpass("Repeat password: "):
+            raise ValueError("Passwords don't match.")
+    else:
+        password = sys.stdin.readline().rstrip("\n")
+    if not password:
+        raise ValueError("Empty password.")
+    return password
+
+
+def cmd_add(args):
+    if args.stdin:
+        try:
+            rows = _read_stdin_rows(args.vault)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    else:
+        if not args.app_name or not args.username:
+            print("Error: add needs APP_NAME and USERNAME (or --stdin).", file=sys.stderr)
+            return 1
+        try:
+            if args.generate:
+                password = logic.generate_password(args.length)
+            else:
+                password = args.password or _read_password()
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        rows = [{"app_name": args.app_name, "username": args.username,
+                 "password": password, "vault": args.vault, "urls": args.url}]
+    try:
+        logic.add_password_entries(rows)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    generated = rows[0]["password"] if not args.stdin and args.generate else None
+    if args.json:
+        _print_json(dict({"added": len(rows)}, **({"password": generated} if generated else {})))
+    else:
+        print(f"Added {len(rows)} entr{'y' if len(rows) == 1 else 'ies'}.")
+        if generated:
+            print(generated)
+    return 0
+
+
+def cmd_edit(args):
+    changes = {field: getattr(args, field) for field in ("app_name", "username", "password", "vault")
+               if getattr(args, field)}
+    try:
+        if args.generate:
+            changes["password"] = logic.generate_password(args.length)
+        elif args.password == "":
+            # --password without a value: prompt rather than take it from argv.
+            changes["password"] = _read_password()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.url or args.no_urls:
+        changes["urls"] = args.url
+    if not changes:
+        print("Error: nothing to change.", file=sys.stderr)
+        return 1
+    try:
+        logic.update_entry(args.id, **changes)
+    except KeyError:
+        print(f"Error: no entry with id {args.id}.", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        result = {"updated": args.id, "fields": sorted(changes)}
+        if args.generate:
+            result["password"] = changes["password"]
+        _print_json(result)
+    else:
+        print(f"Updated {', '.join(sorted(changes))}.")
+        if args.generate:
+            print(changes["password"])
+    return 0
+
+
+def cmd_gen(args):
+    import password_generator
+    policy = password_generator.PasswordPolicy(
+        min_length=args.length,
+        symbols=password_generator.DEFAULT_SYMBOLS if not args.no_symbols else "",
+        require_each_class=args.length >= 4,
+        exclude_ambiguous=args.no_ambiguous,
+    )
+    passwords = password_generator.PasswordGenerator(policy).generate_many(args.count)
+    if args.json:
+        _print_json(passwords)
+    else:
+        sys.stdout.write("\n".join(passwords) + "\n")
+    return 0
+
+
+def cmd_history(args):
+    import vault_history
+    changes = vault_history.default_history().log()[-args.limit:]
+    if args.json:
+        _print_json([{"seq": seq, "time": time, "kind": kind, "records": count}
+                     for seq, time, kind, count in changes])
+    elif not changes:
+        print("No history recorded.")
+    else:
+        for seq, time, kind, count in changes:
+            print(f"{seq:>6}  {time[:19]}  {kind:<8} {count} record{'s' if count != 1 else ''}")
+    return 0
+
+
+def cmd_undo(args):
+    import vault_history
+    history = vault_history.default_history()
+    step = history.undo if args.command == "undo" else history.redo
+    if not step():
+        print(f"Nothing to {args.command}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_restore(args):
+    import vault_history
+    if not vault_history.default_history().restore(args.time):
+        print(f"History does not reach back to {args.time}.", file=sys.stderr)
+        return 1
+    print(f"Vault restored to {args.time}. Run 'aegisvault undo' to revert.")
+    return 0
+
+
+def cmd_attach(args):
+    name = args.name or (os.path.basename(args.file) if args.file != "-" else None)
+    if not name:
+        print("Error: give --name when reading the attachment from stdin.", file=sys.stderr)
+        return 1
+    try:
+        if args.file == "-":
+            ref = logic.attach(args.id, sys.stdin.buffer, name)
+        else:
+            with open(args.file, "rb") as f:
+                ref = logic.attach(args.id, f, name)
+    except KeyError:
+        print(f"Error: no entry with id {args.id}.", file=sys.stderr)
+        return 1
+    if args.json:
+        _print_json({"ref": ref, "name": name})
+    else:
+        print(ref)
+    return 0
+
+
+def cmd_attachments(args):
+    try:
+        items = logic.list_attachments(args.id)
+    except KeyError:
+        print(f"Error: no entry with id {args.id}.", file=sys.stderr)
+        return 1
+    if args.json:
+        _print_json(items)
+    elif not items:
+        print("No attachments.")
+    else:
+        for item in items:
+            print(f"{item['ref'][:12]}  {item['size']:>12,}  {item['name']}")
+    return 0
+
+
+def _find_ref(target_id, prefix):
+    matches = [item["ref"] for item in logic.list_attachments(target_id) if item["ref"].startswith(prefix)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def cmd_extract(args):
+    # Decrypted a chunk at a time, so large files never sit in memory whole.
+    try:
+        ref = _find_ref(args.id, args.ref)
+    except KeyError:
+        ref = None
+    if ref is None:
+        print(f"Error: no single attachment {args.ref} on entry {args.id}.", file=sys.stderr)
+        return 1
+    with logic.open_attachment(args.id, ref) as reader:
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            for chunk in reader:
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    return 0
+
+
+def cmd_detach(args):
+    try:
+        ref = _find_ref(args.id, args.ref)
+    except KeyError:
+        ref = None
+    if ref is None or not logic.detach(args.id, ref):
+        print(f"Error: no single attachment {args.ref} on entry {args.id}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_prune(args):
+    removed = logic.prune_attachments()
+    print(f"Removed {removed} unreferenced attachment{'s' if removed != 1 else ''}.")
+    return 0
+
+
+def cmd_seal(args):
+    sealed = logic.seal_vault()
+    if args.json:
+        _print_json({"sealed": sealed})
+    else:
+        print(f"Sealed {sealed} entr{'y' if sealed == 1 else 'ies'}.")
+    return 0
+
+
+def cmd_sync(args):
+    import vault_sync
+    if not os.path.isdir(args.other):
+        print(f"Error: {args.other} is not a directory.", file=sys.stderr)
+        return 1
+    stats = vault_sync.sync_directories(args.local, args.other)
+    if args.json:
+        _print_json(stats)
+    else:
+        print(f"Pulled {stats['pulled']}, pushed {stats['pushed']} "
+              f"({stats['records_exchanged']} records compared, {stats['nodes_compared']} tree nodes).")
+    return 0
+
+
+# ------------------ Entry Point ------------------
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="machine-readable output")
+
+    parser = argparse.ArgumentParser(prog="aegisvault", description="AegisVault password manager CLI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("get", parents=[common], help="print the password for an application")
+    p.add_argument("app_name")
+    p.add_argument("--username")
+    p.set_defaults(func=cmd_get)
+
+    p = sub.add_parser("add", parents=[common], help="add an entry, or many with --stdin")
+    p.add_argument("app_name", nargs="?")
+    p.add_argument("username", nargs="?")
+    p.add_argument("--password", help="avoid: a value on the command line shows up in ps and shell history; "
+                                      "without it you are prompted, or one line is read from stdin")
+    p.add_argument("--generate", action="store_true", help="generate the password and print it")
+    p.add_argument("--length", type=int, default=16)
+    p.add_argument("--vault", default="Personal")
+    p.add_argument("--url", action="append", default=[], help="website of the entry; repeat for several")
+    p.add_argument("--stdin", action="store_true", help="read JSON lines or TSV rows from stdin")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("edit", parents=[common], help="change fields of one entry by id (see ls --json)")
+    p.add_argument("id")
+    p.add_argument("--app-name", dest="app_name")
+    p.add_argument("--username")
+    p.add_argument("--password", nargs="?", const="",
+                   help="change the password; give no value to be prompted (a value shows up in ps and shell history)")
+    p.add_argument("--generate", action="store_true", help="generate a new password and print it")
+    p.add_argument("--length", type=int, default=16)
+    p.add_argument("--vault")
+    p.add_argument("--url", action="append", default=[], help="replace the websites; repeat for several")
+    p.add_argument("--no-urls", action="store_true", help="remove the websites")
+    p.set_defaults(func=cmd_edit)
+
+    p = sub.add_parser("url", parents=[common], help="entries saved for a website, best match first")
+    p.add_argument("url", help="e.g. https://accounts.google.com/signin")
+    p.add_argument("--password", action="store_true", help="print only the best match's password")
+    p.add_argument("--host-only", action="store_true", help="skip entries saved for other hosts of the site")
+    p.set_defaults(func=cmd_url)
+
+    p = sub.add_parser("search", parents=[common], help="search application, username and vault")
+    p.add_argument("text")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("gen", parents=[common], help="generate passwords")
+    p.add_argument("--length", type=int, default=16)
+    p.add_argument("-n", "--count", type=int, default=1)
+    p.add_argument("--no-symbols", action="store_true")
+    p.add_argument("--no-ambiguous", action="store_true")
+    p.set_defaults(func=cmd_gen)
+
+    p = sub.add_parser("ls", parents=[common], help="list entries")
+    p.add_argument("--vault")
+    p.set_defaults(func=cmd_ls)
+
+    p = sub.add_parser("history", parents=[common], help="show recent vault changes")
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser("undo", help="revert the last change")
+    p.set_defaults(func=cmd_undo)
+
+    p = sub.add_parser("redo", help="re-apply the last undone change")
+    p.set_defaults(func=cmd_undo)
+
+    p = sub.add_parser("restore", help="rewrite the vault as it was at an ISO time")
+    p.add_argument("time", help="e.g. 2024-05-01T09:30")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser("attach", parents=[common], help="encrypt a file (or stdin, e.g. a secure note) onto an entry")
+    p.add_argument("id")
+    p.add_argument("file", help="path, or - for stdin")
+    p.add_argument("--name", help="name to store (default: the file name)")
+    p.set_defaults(func=cmd_attach)
+
+    p = sub.add_parser("attachments", parents=[common], help="list an entry's attachments")
+    p.add_argument("id")
+    p.set_defaults(func=cmd_attachments)
+
+    p = sub.add_parser("extract", help="decrypt an attachment to a file or stdout")
+    p.add_argument("id")
+    p.add_argument("ref", help="attachment ref or a unique prefix of it")
+    p.add_argument("-o", "--output", default="-")
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("detach", help="remove an attachment from an entry")
+    p.add_argument("id")
+    p.add_argument("ref", help="attachment ref or a unique prefix of it")
+    p.set_defaults(func=cmd_detach)
+
+    p = sub.add_parser("prune-attachments", help="delete attachment blobs nothing refers to any more")
+    p.set_defaults(func=cmd_prune)
+
+    p = sub.add_parser("seal", parents=[common], help="encrypt application names and usernames stored in plain text")
+    p.set_defaults(func=cmd_seal)
+
+    p = sub.add_parser("sync", parents=[common], help="merge this vault with a copy in another directory")
+    p.add_argument("other", help="directory holding the other vault copy")
+    p.add_argument("--local", default=".", help="directory of this vault (default: current)")
+    p.set_defaults(func=cmd_sync)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import time
+import pyotp
+from PySide6.QtCore import QObject, QTimer, Signal
+from logic import decrypt
+
+
+def parse_otp(value):
+    """Builds a TOTP from an otpauth:// URI or a bare base32 secret; raises ValueError if invalid."""
+    value = value.strip()
+    try:
+        if value.lower().startswith("otpauth://"):
+            otp = pyotp.parse_uri(value)
+            if not isinstance(otp, pyotp.TOTP):
+                raise ValueError("Only time-based (totp) otpauth URIs are supported.")
+        else:
+            otp = pyotp.TOTP(value.replace(" ", "").upper())
+        otp.now()
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Invalid authenticator key: {e}")
+    return otp
+
+
+class CodeScheduler(QObject):
+    """Computes the codes of all visible entries in one batch per time step.
+
+    A single timer wakes at the next step boundary of the visible entries;
+    rows never get timers of their own. Secrets are decrypted once per
+    unlock session and cached until lock_session().
+    """
+
+    codes_updated = Signal(dict)    # entry id -> current code
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._otps = {}       # entry id -> (encrypted token, TOTP)
+        self._visible = {}    # entry id -> encrypted token
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.refresh)
+
+    def lock_session(self):
+        self._otps.clear()
+        self._visible.clear()
+        self._timer.stop()
+
+    def set_visible(self, entries):
+        self._visible = {entry["id"]: entry["totp"] for entry in entries if entry.get("totp")}
+        self.refresh()
+
+    def _otp(self, entry_id, token):
+        cached = self._otps.get(entry_id)
+        if cached is None or cached[0] != token:
+            try:
+                otp = parse_otp(decrypt(token))
+            except Exception:
+                otp = None
+            cached = self._otps[entry_id] = (token, otp)
+        return cached[1]
+
+    def current_code(self, entry_id):
+        token = self._visible.get(entry_id)
+        otp = self._otp(entry_id, token) if token else None
+        return otp.now() if otp else ""
+
+    def refresh(self):
+        self._timer.stop()
+        if not self._visible:
+            return
+        now = time.time()
+        codes = {}
+        next_boundary = None
+        for entry_id, token in self._visible.items():
+            otp = self._otp(entry_id, token)
+            if otp is None:
+                codes[entry_id] = "Invalid key"
+                continue
+            codes[entry_id] = otp.at(now)
+            boundary = (int(now // otp.interval) + 1) * otp.interval
+            if next_boundary is None or boundary < next_boundary:
+                next_boundary = boundary
+        self.codes_updated.emit(codes)
+        if next_boundary is not None:
+            # A few ms of slack so the wake-up lands inside the new step.
+            self._timer.start(int((next_boundary - now) * 1000) + 20)
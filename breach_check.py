@@ -0,0 +1,207 @@
+import os
+import mmap
+import struct
+import hashlib
+import threading
+
+# ------------------ File Paths ------------------
+
+BREACH_CORPUS_FILE = "breached.bin"
+BREACH_BLOOM_FILE = "breached.bloom"
+
+# ------------------ On-disk Layout ------------------
+#
+# Corpus: 16 byte header (magic, prefix width, record count) followed by
+# fixed-width SHA-1 prefixes sorted ascending, so record i lives at
+# HEADER + i * width and can be binary-searched straight out of the mmap.
+#
+# Bloom: 16 byte header (magic, hash count, bit count) followed by the bit
+# array. Bit positions come from the SHA-1 digest itself (double hashing),
+# so a lookup never hashes the password more than once.
+
+CORPUS_MAGIC = b"AVBR"
+BLOOM_MAGIC = b"AVBF"
+CORPUS_HEADER = struct.Struct(">4sB3xQ")
+BLOOM_HEADER = struct.Struct(">4sB3xQ")
+DEFAULT_PREFIX_BYTES = 10
+DEFAULT_BLOOM_BITS_PER_ENTRY = 10
+DEFAULT_BLOOM_HASHES = 7
+
+
+def password_digest(password):
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+def _bloom_positions(digest, hashes, bits):
+    h1 = int.from_bytes(digest[0:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+# ------------------ Corpus Builder ------------------
+
+def _iter_source_digests(source_path):
+    # Accepts the "HEX" or "HEX:count" line format of the public SHA-1 dumps.
+    with open(source_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield bytes.fromhex(line.split(":", 1)[0])
+
+
+def build_corpus(source_path, corpus_path=BREACH_CORPUS_FILE, bloom_path=BREACH_BLOOM_FILE,
+                 prefix_bytes=DEFAULT_PREFIX_BYTES, bits_per_entry=DEFAULT_BLOOM_BITS_PER_ENTRY,
+                 hashes=DEFAULT_BLOOM_HASHES):
+    """Converts a hash-sorted SHA-1 text dump into the corpus and Bloom files."""
+    count = sum(1 for _ in _iter_source_digests(source_path))
+    bits = max(count * bits_per_entry, 64)
+
+    with open(bloom_path, "wb") as f:
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, hashes, bits))
+        f.truncate(BLOOM_HEADER.size + (bits + 7) // 8)
+
+    with open(corpus_path, "wb") as out, open(bloom_path, "r+b") as bf:
+        bloom = mmap.mmap(bf.fileno(), 0)
+        try:
+            out.write(CORPUS_HEADER.pack(CORPUS_MAGIC, prefix_bytes, count))
+            previous = b""
+            for digest in _iter_source_digests(source_path):
+                prefix = digest[:prefix_bytes]
+                if prefix < previous:
+                    raise ValueError("Source file must be sorted by hash.")
+                if prefix != previous:
+                    out.write(prefix)
+                previous = prefix
+                for pos in _bloom_positions(digest, hashes, bits):
+                    bloom[BLOOM_HEADER.size + (pos >> 3)] |= 1 << (pos & 7)
+        finally:
+            bloom.close()
+
+        # Duplicate prefixes were collapsed, so fix up the record count.
+        written = (out.tell() - CORPUS_HEADER.size) // prefix_bytes
+        out.seek(0)
+        out.write(CORPUS_HEADER.pack(CORPUS_MAGIC, prefix_bytes, written))
+
+
+# ------------------ Breach Checker ------------------
+
+class BreachChecker:
+    """Offline lookups against a memory-mapped breached-password corpus."""
+
+    def __init__(self, corpus_path=BREACH_CORPUS_FILE, bloom_path=BREACH_BLOOM_FILE):
+        self.corpus_path = corpus_path
+        self.bloom_path = bloom_path
+        self._corpus = None
+        self._bloom = None
+        self._opened = False
+        self._lock = threading.Lock()
+
+    def _open(self):
+        # Mapping is deferred to the first lookup so app startup stays free.
+        # Loader threads and the GUI thread may both get here first, so the
+        # flag is only set once the files are mapped, under the lock.
+        if self._opened:
+            return
+        with self._lock:
+            if self._opened:
+                return
+            try:
+                self._map_files()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"[WARN] Breach check disabled: {e}")
+                self.close()
+            self._opened = True
+
+    def _map_files(self):
+        if not os.path.exists(self.corpus_path):
+            return
+        with open(self.corpus_path, "rb") as f:
+            self._corpus = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._corpus) < CORPUS_HEADER.size:
+            raise ValueError(f"{self.corpus_path} is not a breach corpus file.")
+        magic, self._width, self._count = CORPUS_HEADER.unpack_from(self._corpus, 0)
+        if magic != CORPUS_MAGIC or self._width == 0:
+            raise ValueError(f"{self.corpus_path} is not a breach corpus file.")
+        # Lookups index straight into the map, so a file shorter than its
+        # header claims would read past the real data.
+        if len(self._corpus) < CORPUS_HEADER.size + self._count * self._width:
+            raise ValueError(f"{self.corpus_path} is truncated.")
+        if os.path.exists(self.bloom_path):
+            with open(self.bloom_path, "rb") as f:
+                self._bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._bloom) < BLOOM_HEADER.size:
+                raise ValueError(f"{self.bloom_path} is truncated.")
+            magic, self._hashes, self._bits = BLOOM_HEADER.unpack_from(self._bloom, 0)
+            if magic != BLOOM_MAGIC:
+                self._bloom.close()
+                self._bloom = None
+            elif self._bits == 0 or len(self._bloom) < BLOOM_HEADER.size + (self._bits + 7) // 8:
+                raise ValueError(f"{self.bloom_path} is truncated.")
+
+    def available(self):
+        self._open()
+        return self._corpus is not None
+
+    def _maybe_in_bloom(self, digest):
+        if self._bloom is None:
+            return True
+        bloom = self._bloom
+        for pos in _bloom_positions(digest, self._hashes, self._bits):
+            if not bloom[BLOOM_HEADER.size + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _in_corpus(self, digest):
+        corpus, width = self._corpus, self._width
+        prefix = digest[:width]
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = CORPUS_HEADER.size + mid * width
+            record = corpus[offset:offset + width]
+            if record < prefix:
+                lo = mid + 1
+            elif record > prefix:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def _check_digest(self, digest):
+        return self._maybe_in_bloom(digest) and self._in_corpus(digest)
+
+    def is_breached(self, password):
+        if not self.available():
+            return False
+        return self._check_digest(password_digest(password))
+
+    def check_many(self, passwords):
+        """Returns one bool per password; lookups run in digest order for page locality.
+
+        None stands for a password that couldn't be read and is never breached.
+        """
+        passwords = list(passwords)
+        results = [False] * len(passwords)
+        if not self.available():
+            return results
+        digests = {i: password_digest(p) for i, p in enumerate(passwords) if p is not None}
+        for i in sorted(digests, key=digests.__getitem__):
+            results[i] = self._check_digest(digests[i])
+        return results
+
+    def close(self):
+        for m in (self._corpus, self._bloom):
+            if m is not None:
+                m.close()
+        self._corpus = None
+        self._bloom = None
+        self._opened = False
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 2:
+        print("Usage: python breach_check.py <sha1-ordered-by-hash.txt>")
+        sys.exit(1)
+    build_corpus(sys.argv[1])
+    print(f"[INFO] Wrote {BREACH_CORPUS_FILE} and {BREACH_BLOOM_FILE}")
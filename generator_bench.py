@@ -0,0 +1,221 @@
+import sys
+import json
+import math
+import time
+import string
+import argparse
+import platform
+from collections import Counter
+
+import password_generator
+from password_generator import PasswordGenerator, PasswordPolicy
+
+# ------------------ Settings ------------------
+
+REPORT_FILE = "generator_report.json"
+BENCH_LENGTHS = (8, 16, 32, 64, 128)
+STATS_LENGTH = 16
+DEFAULT_SAMPLES = 2_000_000      # characters drawn per generator for the statistics
+DEFAULT_ALPHA = 1e-4             # significance level after Bonferroni correction
+THROUGHPUT_TOLERANCE = 0.8       # fail when below 80% of the baseline rate
+
+
+# ------------------ Generators Under Test ------------------
+
+def _logic_generator():
+    # logic pulls in cryptography and the key file; only load it when benchmarked.
+    import logic
+    return logic.generate_password
+
+
+def generator_specs():
+    """name -> (make_batch(length, n), policy_for_length(length))."""
+    def single(fn):
+        return lambda length, n: [fn(length) for _ in range(n)]
+
+    specs = {
+        "password_generator.generate_password": (
+            single(password_generator.generate_password),
+            lambda length: PasswordPolicy(min_length=length, require_each_class=length >= 4),
+        ),
+        "PasswordGenerator.generate_many": (
+            lambda length, n: PasswordGenerator(PasswordPolicy(min_length=length)).generate_many(n),
+            lambda length: PasswordPolicy(min_length=length),
+        ),
+    }
+    try:
+        specs["logic.generate_password"] = (
+            single(_logic_generator()),
+            lambda length: PasswordPolicy(min_length=length, symbols=string.punctuation,
+                                          require_each_class=length >= 4),
+        )
+    except ImportError as e:
+        print(f"[WARN] Skipping logic.generate_password: {e}")
+    return specs
+
+
+# ------------------ Statistics ------------------
+
+def chi_square_p_value(statistic, df):
+    # Wilson-Hilferty normal approximation, accurate for the df used here.
+    if df <= 0:
+        return 1.0
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def expected_char_probabilities(policy, length):
+    """Per-position symbol probabilities implied by the policy.
+
+    Each required class claims one uniformly chosen position, so a position
+    holds a required-class draw with probability 1/length per class and a
+    full-alphabet draw otherwise.
+    """
+    alphabet = policy.alphabet.decode("ascii")
+    filler = (1 - len(policy.required) / length) / len(alphabet)
+    probabilities = {c: filler for c in alphabet}
+    for chars in policy.required:
+        for c in chars.decode("ascii"):
+            probabilities[c] += 1 / length / len(chars)
+    return probabilities
+
+
+def position_uniformity(passwords, probabilities):
+    length = len(passwords[0])
+    n = len(passwords)
+    p_values = []
+    for position in range(length):
+        counts = Counter(pw[position] for pw in passwords)
+        unexpected = set(counts) - set(probabilities)
+        if unexpected:
+            raise AssertionError(f"Characters outside the policy alphabet: {sorted(unexpected)}")
+        statistic = sum((counts.get(c, 0) - n * p) ** 2 / (n * p) for c, p in probabilities.items())
+        p_values.append(chi_square_p_value(statistic, len(probabilities) - 1))
+    return p_values
+
+
+def class_coverage(passwords, policy):
+    coverage = {}
+    for chars in policy.classes:
+        members = set(chars.decode("ascii"))
+        hits = sum(1 for pw in passwords if not members.isdisjoint(pw))
+        coverage[chars.decode("ascii")[:3] + "..."] = hits / len(passwords)
+    return coverage
+
+
+def modulo_bias(passwords, probabilities):
+    """Compares the symbols a naive `byte % n` would favour against the rest.
+
+    With 256 % n leftover byte values, the first 256 % n symbols of the
+    alphabet would be over-represented by roughly (k + 1) / k.
+    """
+    alphabet = list(probabilities)
+    favoured = alphabet[:256 % len(alphabet)]
+    if not favoured:
+        return {"favoured_symbols": 0, "observed_ratio": 1.0, "p_value": 1.0}
+    counts = Counter("".join(passwords))
+    total = sum(counts.values())
+    expected = sum(probabilities[c] for c in favoured) / sum(probabilities.values())
+    observed = sum(counts.get(c, 0) for c in favoured) / total
+    z = (observed - expected) / math.sqrt(expected * (1 - expected) / total)
+    return {
+        "favoured_symbols": len(favoured),
+        "observed_ratio": observed / expected,
+        "p_value": math.erfc(abs(z) / math.sqrt(2)),
+    }
+
+
+# ------------------ Runner ------------------
+
+def measure_throughput(make_batch, length, budget_seconds=0.5):
+    batch, generated = 1000, 0
+    start = time.perf_counter()
+    while True:
+        make_batch(length, batch)
+        generated += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget_seconds:
+            return generated / elapsed
+        batch = min(batch * 2, 200_000)
+
+
+def run(samples=DEFAULT_SAMPLES, alpha=DEFAULT_ALPHA, lengths=BENCH_LENGTHS):
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "samples": samples,
+        "alpha": alpha,
+        "generators": {},
+    }
+    for name, (make_batch, policy_for_length) in generator_specs().items():
+        print(f"[INFO] {name}")
+        throughput = {str(length): measure_throughput(make_batch, length) for length in lengths}
+
+        policy = policy_for_length(STATS_LENGTH)
+        passwords = make_batch(STATS_LENGTH, max(samples // STATS_LENGTH, 1000))
+        probabilities = expected_char_probabilities(policy, STATS_LENGTH)
+        p_values = position_uniformity(passwords, probabilities)
+        coverage = class_coverage(passwords, policy)
+        bias = modulo_bias(passwords, probabilities)
+
+        required = {chars.decode("ascii")[:3] + "..." for chars in policy.required}
+        checks = {
+            "position_uniformity": min(p_values) * len(p_values) > alpha,
+            "class_coverage": all(coverage[key] == 1.0 for key in required),
+            "modulo_bias": bias["p_value"] > alpha,
+        }
+        report["generators"][name] = {
+            "passwords_per_second": throughput,
+            "position_p_values": p_values,
+            "class_coverage": coverage,
+            "modulo_bias": bias,
+            "checks": checks,
+        }
+    return report
+
+
+def compare_with_baseline(report, baseline):
+    regressions = []
+    for name, result in report["generators"].items():
+        for check, passed in result["checks"].items():
+            if not passed:
+                regressions.append(f"{name}: {check} failed")
+        previous = baseline.get("generators", {}).get(name)
+        if not previous:
+            continue
+        for length, rate in result["passwords_per_second"].items():
+            old_rate = previous["passwords_per_second"].get(length)
+            if old_rate and rate < old_rate * THROUGHPUT_TOLERANCE:
+                regressions.append(f"{name}: length {length} dropped to {rate:,.0f}/s from {old_rate:,.0f}/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and statistically test the password generators.")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="characters sampled per generator")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    parser.add_argument("--output", default=REPORT_FILE)
+    parser.add_argument("--baseline", help="earlier report to compare throughput against")
+    args = parser.parse_args(argv)
+
+    report = run(args.samples, args.alpha)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    report["regressions"] = compare_with_baseline(report, baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for name, result in report["generators"].items():
+        rates = ", ".join(f"{length}: {rate:,.0f}/s" for length, rate in result["passwords_per_second"].items())
+        print(f"{name}\n    {rates}\n    checks: {result['checks']}")
+    for regression in report["regressions"]:
+        print(f"[FAIL] {regression}")
+    print(f"[INFO] Report written to {args.output}")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import os
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QAbstractItemView, QFrame, QHeaderView
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIcon, QFont
+from reuse_index import ReuseIndex
+
+ISSUES = ("weak", "old", "reused", "breached")
+
+
+# ------------------ Health Aggregates ------------------
+
+class _EntryFlags:
+    # One per tracked entry, so slots rather than a dict.
+    __slots__ = ("vault",) + ISSUES
+
+    def __init__(self, vault, weak, old, reused, breached):
+        self.vault, self.weak, self.old, self.reused, self.breached = vault, weak, old, reused, breached
+
+
+class VaultHealth:
+    """Per-vault issue counters kept current as entries are added, changed or removed.
+
+    Every mutation touches only the affected entry (plus, for reuse, the one
+    other entry whose group crosses the 1 <-> 2 boundary), so reading the
+    dashboard never decrypts or scans the vault.
+    """
+
+    def __init__(self):
+        self.reuse_index = ReuseIndex()
+        self._flags = {}   # entry id -> _EntryFlags
+        self._stats = {}   # vault -> counters
+
+    def _counters(self, vault):
+        if vault not in self._stats:
+            self._stats[vault] = {"total": 0, "at_risk": 0, **{issue: 0 for issue in ISSUES}}
+        return self._stats[vault]
+
+    def _apply(self, flags, sign):
+        counters = self._counters(flags.vault)
+        counters["total"] += sign
+        at_risk = False
+        for issue in ISSUES:
+            if getattr(flags, issue):
+                counters[issue] += sign
+                at_risk = True
+        if at_risk:
+            counters["at_risk"] += sign
+
+    def _set(self, entry_id, **changes):
+        flags = self._flags[entry_id]
+        self._apply(flags, -1)
+        for issue, value in changes.items():
+            setattr(flags, issue, value)
+        self._apply(flags, 1)
+
+    def _refresh_reuse(self, entry_ids):
+        for entry_id in list(entry_ids):
+            reused = self.reuse_index.is_reused(entry_id)
+            if entry_id in self._flags and self._flags[entry_id].reused != reused:
+                self._set(entry_id, reused=reused)
+
+    def add_entry(self, entry_id, vault, fingerprint, weak, old=False, breached=False):
+        if entry_id in self._flags:
+            self.remove_entry(entry_id)
+        self.reuse_index.add(entry_id, fingerprint)
+        flags = _EntryFlags(vault, weak, old, False, breached)
+        self._flags[entry_id] = flags
+        self._apply(flags, 1)
+        group = self.reuse_index.members(entry_id)
+        if len(group) == 2:
+            self._refresh_reuse(group)
+        elif len(group) > 2:
+            self._refresh_reuse([entry_id])
+
+    def remove_entry(self, entry_id):
+        flags = self._flags.pop(entry_id, None)
+        if flags is None:
+            return
+        self._apply(flags, -1)
+        others = self.reuse_index.members(entry_id) - {entry_id}
+        self.reuse_index.remove(entry_id)
+        if len(others) == 1:
+            self._refresh_reuse(others)
+
+    def set_old(self, entry_id, old=True):
+        if entry_id in self._flags and self._flags[entry_id].old != old:
+            self._set(entry_id, old=old)
+
+    def set_breached(self, entry_id, breached=True):
+        if entry_id in self._flags and self._flags[entry_id].breached != breached:
+            self._set(entry_id, breached=breached)
+
+    def clear(self):
+        self.reuse_index.clear()
+        self._flags.clear()
+        self._stats.clear()
+
+    def vaults(self):
+        return sorted(vault for vault, counters in self._stats.items() if counters["total"])
+
+    def stats(self, vault=None):
+        if vault is not None:
+            return dict(self._counters(vault))
+        totals = {"total": 0, "at_risk": 0, **{issue: 0 for issue in ISSUES}}
+        for counters in self._stats.values():
+            for name, value in counters.items():
+                totals[name] += value
+        return totals
+
+    def score(self, vault=None):
+        """Share of entries with no weak, old, reused or breached password, 0-100."""
+        counters = self.stats(vault)
+        if not counters["total"]:
+            return 100
+        return round(100 * (counters["total"] - counters["at_risk"]) / counters["total"])
+
+
+# ------------------ Dashboard Screen ------------------
+
+class HealthDashboardScreen(QWidget):
+    def __init__(self, health, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("AegisVault - Vault Health")
+        self.setMinimumSize(700, 420)
+        self.setStyleSheet(self.main_style())
+        self.health = health
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(18)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        # --- Top Bar: Title, Overall Score, Close ---
+        top_bar = QHBoxLayout()
+        title = QLabel("Vault Health")
+        title.setStyleSheet("font-size: 26px; font-weight: 800; color: #78A083; background: transparent;")
+        top_bar.addWidget(title)
+        top_bar.addStretch(1)
+
+        self.score_label = QLabel("")
+        self.score_label.setStyleSheet("font-size: 20px; font-weight: 700; color: #FFFFFF; background: transparent;")
+        top_bar.addWidget(self.score_label)
+
+        self.close_btn = QPushButton("Close")
+        self.close_btn.setIcon(QIcon(os.path.join("assets", "close.png")))
+        self.close_btn.setFixedHeight(38)
+        self.close_btn.setFixedWidth(110)
+        self.close_btn.setStyleSheet(self.button_style())
+        self.close_btn.clicked.connect(self.close_dashboard)
+        top_bar.addWidget(self.close_btn)
+        layout.addLayout(top_bar)
+
+        # --- Per-vault Table ---
+        self.table = QTableWidget()
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels([
+            "Vault", "Entries", "Weak", "Old", "Reused", "Breached", "Score"
+        ])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setStyleSheet(self.table_style())
+        self.table.setFont(QFont("Segoe UI", 11))
+        self.table.setFrameShape(QFrame.NoFrame)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+    def refresh(self):
+        # Reads the maintained counters only: one row per vault.
+        vaults = self.health.vaults()
+        self.table.setRowCount(len(vaults))
+        for row, vault in enumerate(vaults):
+            counters = self.health.stats(vault)
+            values = [
+                vault, counters["total"], counters["weak"], counters["old"],
+                counters["reused"], counters["breached"], f"{self.health.score(vault)}%"
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                item.setFlags(Qt.ItemIsEnabled)
+                if column:
+                    item.setTextAlignment(Qt.AlignCenter)
+                self.table.setItem(row, column, item)
+        self.score_label.setText(f"Overall Score: {self.health.score()}%")
+
+    def showEvent(self, event):
+        self.refresh()
+        super().showEvent(event)
+
+    def close_dashboard(self):
+        if self.parent() and hasattr(self.parent(), "show_vault_viewer_screen"):
+            self.parent().show_vault_viewer_screen()
+
+    # --- Styles ---
+    def main_style(self):
+        return """
+            QWidget {
+                background: #344955;
+            }
+        """
+
+    def table_style(self):
+        return """
+            QTableWidget {
+                background: #35374B;
+                border-radius: 10px;
+                border: 2px solid #50727B;
+                gridline-color: #50727B;
+                alternate-background-color: #344955;
+                color: #FFF;
+            }
+            QHeaderView::section {
+                background-color: #50727B;
+                color: #78A083;
+                font-size: 15px;
+                font-weight: bold;
+                border: none;
+                padding: 6px 0;
+            }
+        """
+
+    def button_style(self):
+        return """
+            QPushButton {
+                background-color: #35374B;
+                color: #78A083;
+                border-radius: 10px;
+                font-size: 15px;
+                font-weight: 600;
+                border: 2px solid #78A083;
+                padding: 0 14px;
+            }
+            QPushButton:hover {
+                background-color: #78A083;
+                color: #35374B;
+                border: 2px solid #50727B;
+            }
+        """
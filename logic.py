@@ -1,82 +1,628 @@
 import os
 import json
-import secrets
+import hmac
+import time
+import hashlib
 import string
-import pyotp
-import qrcode
-from cryptography.fernet import Fernet
+import threading
+from datetime import datetime
+import password_generator
+from vault_store import ShardStore, new_record_id, legacy_record_id
+from vault_trace import traced
+from vault_metrics import timed, histogram
+from vault_blind import BlindIndex, may_match, normalize
+from vault_domains import DomainIndex, parse_url, site_of
 
 # ------------------ File Paths ------------------
 
 KEY_FILE = "key.key"
-VAULT_FILE = "vault.json"
+VAULT_DIR = "vaults"
+VAULT_FILE = "vault.json"   # single-file layout from before sharding, migrated on first use
+TOMBSTONE_FILE = "vault_tombstones.json"
+ATTACHMENT_DIR = "attachments"
 TOTP_SECRET_FILE = "aegis_secret.txt"
 
 # ------------------ Encryption Key Setup ------------------
+#
+# cryptography is imported on first use, so callers that never touch a
+# secret (listing, searching, generating) don't pay for loading it.
 
-if not os.path.exists(KEY_FILE):
-    with open(KEY_FILE, "wb") as f:
-        f.write(Fernet.generate_key())
+_fernet = None
+_fingerprint_key = None
+_blind_index = None
+_attachments = None
+_store = None
 
-with open(KEY_FILE, "rb") as f:
-    key = f.read()
+def load_key():
+    if not os.path.exists(KEY_FILE):
+        from cryptography.fernet import Fernet
+        with open(KEY_FILE, "wb") as f:
+            f.write(Fernet.generate_key())
 
-fernet = Fernet(key)
+    with open(KEY_FILE, "rb") as f:
+        return f.read()
+
+def get_fernet():
+    global _fernet
+    if _fernet is None:
+        from cryptography.fernet import Fernet
+        _fernet = Fernet(load_key())
+    return _fernet
+
+def get_fingerprint_key():
+    # Separate key for password fingerprints so they can't be used to test Fernet tokens.
+    global _fingerprint_key
+    if _fingerprint_key is None:
+        _fingerprint_key = hmac.new(load_key(), b"aegisvault-password-fingerprint", hashlib.sha256).digest()
+    return _fingerprint_key
+
+def get_blind_index():
+    # Its own key too, so search tokens say nothing about passwords or fingerprints.
+    global _blind_index
+    if _blind_index is None:
+        _blind_index = BlindIndex(hmac.new(load_key(), b"aegisvault-blind-index", hashlib.sha256).digest())
+    return _blind_index
 
 # ------------------ Encryption Functions ------------------
 
 def encrypt(text):
-    return fernet.encrypt(text.encode()).decode()
+    return get_fernet().encrypt(text.encode()).decode()
 
 def decrypt(token):
-    return fernet.decrypt(token.encode()).decode()
+    return get_fernet().decrypt(token.encode()).decode()
 
-# ------------------ Vault Management ------------------
+def password_fingerprint(password):
+    return hmac.new(get_fingerprint_key(), password.encode(), hashlib.sha256).hexdigest()
+
+# ------------------ Sealed Metadata ------------------
+#
+# Application names and usernames are stored encrypted, next to their
+# blind-index tokens under "blind". The vault name stays readable: it is
+# what records are sharded by. Records written before sealing have no
+# "blind" key; they are read as they are and sealed by seal_vault().
+#
+# Website URLs are stored as one encrypted, newline-separated string under
+# "urls". Their only blind tokens are exact ones for each URL's site
+# (registrable domain) under "site", which is all a URL lookup needs.
+
+SEALED_FIELDS = ("app_name", "username")
+
+def is_sealed(entry):
+    return "blind" in entry
+
+def seal_field(entry, field, value):
+    # "blind" is replaced rather than updated: entry is often a shallow copy
+    # of a stored record whose tokens must stay as they were.
+    blind = dict(entry.get("blind", ()))
+    blind[field] = get_blind_index().tokens(field, value)
+    entry[field] = encrypt(value)
+    entry["blind"] = blind
+
+def seal_entry(entry):
+    """Encrypts the metadata of a plain-text record in place; sealed records are left alone."""
+    if not is_sealed(entry):
+        entry["blind"] = {}
+        for field in SEALED_FIELDS:
+            seal_field(entry, field, entry[field])
+    return entry
+
+def unsealed_metadata(entry):
+    """{field: plain text} of a stored record's sealed fields."""
+    if not is_sealed(entry):
+        return {field: entry[field] for field in SEALED_FIELDS}
+    values = {}
+    for field in SEALED_FIELDS:
+        try:
+            values[field] = decrypt(entry[field])
+        except Exception:
+            values[field] = "Decryption Error"
+    return values
+
+def seal_urls(entry, urls):
+    """Stores the website URLs of a sealed record; an empty list removes them."""
+    urls = [url.strip() for url in urls if url.strip()]
+    for url in urls:
+        parse_url(url)
+    blind = entry["blind"]
+    if not urls:
+        entry.pop("urls", None)
+        blind.pop("site", None)
+        return
+    entry["urls"] = encrypt("\n".join(urls))
+    sites = {site_of(url) for url in urls} - {None}
+    if sites:
+        blind["site"] = get_blind_index().exact_tokens("site", sites)
+    else:
+        blind.pop("site", None)
 
-def load_vault():
-    if not os.path.exists(VAULT_FILE):
+def entry_urls(entry):
+    """Plain-text URLs of a stored record."""
+    if "urls" not in entry:
+        return []
+    try:
+        return decrypt(entry["urls"]).split("\n")
+    except Exception:
         return []
-    with open(VAULT_FILE, "r") as f:
+
+# ------------------ Vault Management ------------------
+
+def entry_id(entry):
+    # Records from before IDs existed get the same ID the store assigns when migrating them.
+    return entry.get("id") or legacy_record_id(entry)
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = ShardStore(VAULT_DIR, legacy_file=VAULT_FILE)
+    return _store
+
+def vault_names():
+    return get_store().names()
+
+@traced()
+def load_vault(vault=None):
+    """Stored records of one vault, or of all of them; only the shards asked for are read."""
+    return get_store().load(vault)
+
+def stream_vault(vault=None):
+    """Like load_vault, but yields records as they are parsed instead of returning a list."""
+    return get_store().stream(vault)
+
+def load_tombstones(path=TOMBSTONE_FILE):
+    """{id: deleted_at} for records deleted from this copy, kept so sync can propagate deletes."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
         try:
             return json.load(f)
         except json.JSONDecodeError:
-            return []
+            return {}
 
-def save_vault(data):
-    with open(VAULT_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def save_tombstones(tombstones, path=TOMBSTONE_FILE):
+    with open(path, "w") as f:
+        json.dump(tombstones, f, indent=4)
 
-def add_password_entry(app_name, username, password, vault="Personal"):
-    encrypted_password = encrypt(password)
-    data = load_vault()
-    data.append({
+def record_version(entry):
+    # Last-writer-wins ordering; records from before updated_at fall back to date_added.
+    return entry.get("updated_at") or entry.get("date_added", "")
+
+@traced()
+def _log_changes(changes, history_op):
+    if history_op:
+        import vault_history
+        vault_history.default_history().record_changes(changes, history_op, load_vault)
+
+@traced()
+def _tombstone(deleted, revived=()):
+    tombstones = load_tombstones()
+    revived = [target_id for target_id in revived if target_id in tombstones]
+    if deleted or revived:
+        now = datetime.now().isoformat()
+        for target_id in revived:
+            del tombstones[target_id]
+        for target_id in deleted:
+            tombstones[target_id] = now
+        save_tombstones(tombstones)
+
+@traced()
+@timed("aegisvault_save_vault_seconds", "Time to save the vault, including history and tombstones.")
+def save_vault(data, history_op="edit", stamp=True, vault=None):
+    # With vault set, data is that vault's complete contents and no other
+    # shard is touched. Changed records get a fresh updated_at unless stamp
+    # is False (sync keeps the winning side's time). The change is also
+    # logged to the vault history; pass history_op=None to skip it.
+    import vault_history
+    previous = load_vault(vault)
+    old = {entry_id(entry): entry for entry in previous}
+    now = datetime.now().isoformat()
+    for entry in data:
+        if not entry.get("id"):
+            entry["id"] = entry_id(entry)
+        if stamp and old.get(entry["id"]) != entry:
+            entry["updated_at"] = now
+
+    get_store().save(data, vault)
+    changes = vault_history.diff_records(previous, data, entry_id)
+    _tombstone([i for i, before, after in changes if after is None],
+               [i for i, before, after in changes if before is None])
+    _log_changes(changes, history_op)
+
+def new_entry(app_name, username, password, vault="Personal", totp=None, urls=None):
+    now = datetime.now().isoformat()
+    entry = {
+        "id": new_record_id(),
         "app_name": app_name,
         "username": username,
-        "password": encrypted_password,
-        "vault": vault
-    })
-    save_vault(data)
+        "password": encrypt(password),
+        "fingerprint": password_fingerprint(password),
+        "vault": vault,
+        "date_added": now,
+        "updated_at": now
+    }
+    if totp:
+        entry["totp"] = encrypt(totp)
+    seal_entry(entry)
+    if urls:
+        seal_urls(entry, urls)
+    return entry
 
-def get_decrypted_vault():
-    data = load_vault()
+@traced()
+def add_password_entry(app_name, username, password, vault="Personal", totp=None, urls=None):
+    entry = get_store().put(new_entry(app_name, username, password, vault, totp, urls))
+    _log_changes([[entry["id"], None, entry]], "edit")
+    return entry["id"]
+
+@traced()
+def add_password_entries(rows):
+    """Bulk add: rows are dicts with app_name, username, password and optional vault/totp/urls."""
+    by_vault = {}
+    for row in rows:
+        vault = row.get("vault", "Personal")
+        by_vault.setdefault(vault, []).append(
+            new_entry(row["app_name"], row["username"], row["password"], vault, row.get("totp"), row.get("urls")))
+    for vault, entries in by_vault.items():
+        save_vault(load_vault(vault) + entries, vault=vault)
+
+# ------------------ Single-record Access ------------------
+#
+# These go through the store's ID index and journal, so they cost the same
+# whatever the size of the vault.
+
+EDITABLE_FIELDS = {"app_name", "username", "password", "vault", "totp", "urls"}
+
+@traced()
+def get_entry(target_id):
+    """The stored (encrypted) record with this ID, or None."""
+    return get_store().get(target_id)
+
+@traced()
+def update_entry(target_id, **changes):
+    """Partial update; password, totp and urls (a list) are given in plain text. Returns the stored record."""
+    unknown = set(changes) - EDITABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Fields that can't be edited: {', '.join(sorted(unknown))}")
+    old = get_entry(target_id)
+    if old is None:
+        raise KeyError(target_id)
+
+    entry = dict(old)
+    if is_sealed(old):
+        # Resealing writes into "blind"; the old record (and its history entry) keeps its own tokens.
+        entry["blind"] = dict(old["blind"])
+    if "password" in changes:
+        password = changes.pop("password")
+        entry["password"] = encrypt(password)
+        entry["fingerprint"] = password_fingerprint(password)
+    if "totp" in changes:
+        totp = changes.pop("totp")
+        if totp:
+            entry["totp"] = encrypt(totp)
+        else:
+            entry.pop("totp", None)
+    urls = changes.pop("urls", None)
+    sealed = [field for field in SEALED_FIELDS if field in changes]
+    if sealed and is_sealed(entry):
+        # Unchanged values keep their ciphertext, so a no-op edit stays a no-op.
+        current = unsealed_metadata(old)
+        for field in sealed:
+            value = changes.pop(field)
+            if value != current[field]:
+                seal_field(entry, field, value)
+    entry.update(changes)
+    # Records from before sealing are sealed the first time they are edited.
+    seal_entry(entry)
+    if urls is not None and urls != entry_urls(old):
+        seal_urls(entry, urls)
+    return _put_changed(old, entry)
+
+def _put_changed(old, entry):
+    if entry == old:
+        return old
+    entry["updated_at"] = datetime.now().isoformat()
+    get_store().put(entry)
+    _log_changes([[entry["id"], old, entry]], "edit")
+    return entry
+
+@traced()
+def apply_records(changes, history_op="edit"):
+    """Puts or removes whole records as given ({id: record, or None to remove}), unstamped.
+
+    Only the changed records are appended to the journals, and they are
+    logged as one history entry. Tombstones are left to the caller.
+    """
+    store = get_store()
+    logged = []
+    for target_id, entry in changes.items():
+        old = store.get(target_id)
+        if entry is None:
+            if old is None:
+                continue
+            store.remove(target_id)
+        else:
+            if entry == old:
+                continue
+            store.put(entry)
+        logged.append([target_id, old, entry])
+    _log_changes(logged, history_op)
+    return len(logged)
+
+@traced()
+def delete_entry(target_id):
+    """Removes the record with this ID from storage; returns True if one was found."""
+    removed = get_store().remove(target_id)
+    if removed is None:
+        return False
+    _tombstone([target_id])
+    _log_changes([[target_id, removed, None]], "edit")
+    return True
+
+_decrypt_latency = histogram("aegisvault_decrypt_entry_seconds", "Time to decrypt one stored entry.")
+
+@traced()
+def decrypt_entries(data, passwords=True):
+    """Returns decrypted copies of the given records, leaving the stored ones untouched.
+
+    With passwords=False only the metadata is decrypted, for listings. A
+    password that fails to decrypt reads "Decryption Error" for display and
+    the entry gets "decrypt_error": True, so checks can leave it out.
+    """
+    decrypted, durations = [], []
     for entry in data:
-        try:
-            entry["password"] = decrypt(entry["password"])
-        except Exception:
-            entry["password"] = "Decryption Error"
-    return data
+        start = time.perf_counter()
+        entry = dict(entry)
+        if is_sealed(entry):
+            entry.update(unsealed_metadata(entry))
+            del entry["blind"]
+        if "urls" in entry:
+            entry["urls"] = entry_urls(entry)
+        if passwords:
+            try:
+                entry["password"] = decrypt(entry["password"])
+            except Exception:
+                entry["password"] = "Decryption Error"
+                entry["decrypt_error"] = True
+        decrypted.append(entry)
+        durations.append(time.perf_counter() - start)
+    # Each entry's own time, recorded together so the lock stays off the per-entry path.
+    _decrypt_latency.record_many(durations)
+    return decrypted
+
+@traced()
+def get_decrypted_vault():
+    return decrypt_entries(load_vault())
+
+@traced()
+def find_entries(text, vault=None, field=None, exact=False, passwords=False):
+    """Entries whose application name or username (or vault name) contains text, decrypted.
+
+    field limits the match to one sealed field and exact asks for the
+    whole value. Sealed records are ruled in or out by their blind-index
+    tokens, so only the candidates are decrypted.
+    """
+    text = normalize(text)
+    fields = (field,) if field else SEALED_FIELDS
+    index = get_blind_index()
+    if exact:
+        queries = {name: index.exact_query(name, text) for name in fields}
+    else:
+        queries = {name: index.substring_query(name, text) for name in fields}
+
+    def matches(entry):
+        if not exact and field is None and text in entry["vault"].lower():
+            return True
+        if exact:
+            return any(normalize(entry[name]) == text for name in fields)
+        return any(text in entry[name].lower() for name in fields)
+
+    def candidate(entry):
+        if not is_sealed(entry):
+            return matches(entry)
+        if not exact and field is None and text in entry["vault"].lower():
+            return True
+        return any(may_match(entry["blind"], name, queries[name]) for name in fields)
+
+    found = decrypt_entries([entry for entry in load_vault(vault) if candidate(entry)], passwords=passwords)
+    # Truncated tokens and n-grams can match by accident; the plain text settles it.
+    return [entry for entry in found if matches(entry)]
+
+@traced()
+def seal_vault():
+    """Seals records stored before metadata encryption; returns how many were sealed."""
+    sealed = 0
+    for vault in vault_names():
+        records = load_vault(vault)
+        plain = [entry for entry in records if not is_sealed(entry)]
+        if plain:
+            for entry in plain:
+                seal_entry(entry)
+            save_vault(records, history_op="seal", vault=vault)
+            sealed += len(plain)
+    return sealed
+
+# ------------------ URL Lookup ------------------
+#
+# find_by_url keeps, between calls, which records hold each blind site
+# token. Like the daemon's VaultIndex it compares the shard files' stats
+# on every call and re-reads only the shards that changed, so saves from
+# this or any other process are picked up. Building it decrypts nothing;
+# a lookup fetches and decrypts only the records saved for the URL's
+# site, then ranks them in a DomainIndex of their own.
+
+class _SiteTokens:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = None
+        self._stats = {}
+        self._by_token = {}     # site token -> set of record ids
+        self._tokens = {}       # vault -> [(record id, its tokens)]
+
+    def _drop(self, vault):
+        for target_id, tokens in self._tokens.pop(vault, ()):
+            for token in tokens:
+                ids = self._by_token[token]
+                ids.discard(target_id)
+                if not ids:
+                    del self._by_token[token]
+
+    def _refresh(self, store):
+        if store is not self._store:
+            self.__init__()
+            self._store = store
+        stats = store.shard_stats()
+        if stats == self._stats:
+            return
+        for vault in set(self._tokens) - set(stats):
+            self._drop(vault)
+        for vault, stat in stats.items():
+            if self._stats.get(vault) == stat and vault in self._tokens:
+                continue
+            self._drop(vault)
+            indexed = []
+            for entry in store.load(vault):
+                tokens = entry.get("blind", {}).get("site", "").split()
+                if tokens:
+                    target_id = entry_id(entry)
+                    indexed.append((target_id, tokens))
+                    for token in tokens:
+                        self._by_token.setdefault(token, set()).add(target_id)
+            self._tokens[vault] = indexed
+        self._stats = stats
+
+    def ids(self, store, token):
+        with self._lock:
+            self._refresh(store)
+            return set(self._by_token.get(token, ()))
+
+
+_site_tokens = _SiteTokens()
+
+@traced()
+def find_by_url(url, vault=None, passwords=False, related=True):
+    """Entries saved for the site of a URL, decrypted, best match first (see DomainIndex.lookup).
+
+    Only records whose blind site token matches are read and decrypted.
+    Raises ValueError when url has no host name.
+    """
+    site = site_of(url)
+    if site is None:
+        return []
+    store = get_store()
+    (token,) = get_blind_index().exact_query("site", site)
+    candidates = [store.get(target_id) for target_id in _site_tokens.ids(store, token)]
+    candidates = [entry for entry in candidates
+                  if entry is not None and "urls" in entry and (vault is None or entry["vault"] == vault)]
+    entries = {entry["id"]: entry for entry in decrypt_entries(candidates, passwords=passwords)}
+    index = DomainIndex()
+    for entry in entries.values():
+        index.add_entry(entry)
+    return [entries[target_id] for target_id in index.lookup(url, related)]
+
+# ------------------ Attachments ------------------
+#
+# Files and secure notes are kept as encrypted, content-addressed blobs in
+# ATTACHMENT_DIR; a record lists them under "attachments" as
+# {"name": encrypted name, "ref": blob address, "size": bytes}. Blobs
+# outlive the records that drop them until prune_attachments(), so undo
+# and restore can bring a reference back.
+
+def get_attachment_store():
+    global _attachments
+    if _attachments is None:
+        from vault_attachments import AttachmentStore
+        _attachments = AttachmentStore(ATTACHMENT_DIR, load_key())
+    return _attachments
+
+def _stored_entry(target_id):
+    entry = get_entry(target_id)
+    if entry is None:
+        raise KeyError(target_id)
+    return entry
+
+@traced()
+def attach(target_id, src, name):
+    """Encrypts the binary file object src into the store and lists it on the entry; returns the ref."""
+    old = _stored_entry(target_id)
+    ref, size = get_attachment_store().put(src)
+    entry = dict(old)
+    entry["attachments"] = list(old.get("attachments", ())) + [{"name": encrypt(name), "ref": ref, "size": size}]
+    _put_changed(old, entry)
+    return ref
+
+def list_attachments(target_id):
+    """[{"name", "ref", "size"}] for an entry, names decrypted."""
+    return [
+        dict(item, name=decrypt(item["name"]))
+        for item in _stored_entry(target_id).get("attachments", ())
+    ]
+
+def open_attachment(target_id, ref):
+    """A random-access reader over one of the entry's attachments; close it when done."""
+    if ref not in {item["ref"] for item in _stored_entry(target_id).get("attachments", ())}:
+        raise KeyError(ref)
+    return get_attachment_store().open(ref)
+
+@traced()
+def detach(target_id, ref):
+    """Drops one attachment from an entry; the blob stays until prune_attachments()."""
+    old = _stored_entry(target_id)
+    kept = list(old.get("attachments", ()))
+    refs = [item["ref"] for item in kept]
+    if ref not in refs:
+        return False
+    # The same content attached twice under two names is one ref; drop one listing.
+    del kept[refs.index(ref)]
+    entry = dict(old)
+    if kept:
+        entry["attachments"] = kept
+    else:
+        del entry["attachments"]
+    _put_changed(old, entry)
+    return True
+
+def attachment_refs(entries):
+    return {item["ref"] for entry in entries if entry for item in entry.get("attachments", ())}
+
+@traced()
+def prune_attachments():
+    """Removes blobs no record refers to, in the vault or anywhere in its history; returns how many."""
+    import vault_history
+    referenced = attachment_refs(load_vault())
+    for record in vault_history.default_history().records():
+        if record["kind"] == "snapshot":
+            referenced |= attachment_refs(record["records"])
+        else:
+            referenced |= attachment_refs(side for _, before, after in record["changes"] for side in (before, after))
+    store = get_attachment_store()
+    return sum(store.remove(address) for address in list(store.addresses()) if address not in referenced)
+
+# ------------------ Search ------------------
+#
+# How the vault screen matches and orders rows; RecordTable.select does
+# the same over its key columns. Kept free of Qt.
+
+def matches_search(entry, search_text):
+    # search_text is already lower-cased and stripped.
+    return (search_text in entry["app_name"].lower()
+            or search_text in entry["username"].lower()
+            or search_text in entry["vault"].lower())
+
+def sort_key(sort_field):
+    return lambda entry: entry.get(sort_field, "").lower()
 
 # ------------------ Password Generator ------------------
 
+@traced()
 def generate_password(length=16, use_symbols=True):
-    characters = string.ascii_letters + string.digits
-    if use_symbols:
-        characters += string.punctuation
-    return ''.join(secrets.choice(characters) for _ in range(length))
+    symbols = string.punctuation if use_symbols else ""
+    return password_generator.generate_password(length, symbols=symbols)
 
 # ------------------ TOTP (MFA) Setup ------------------
 
+@traced()
 def setup_totp():
+    import pyotp
+    import qrcode
+
     if os.path.exists(TOTP_SECRET_FILE):
         return True  # Already set up
 
@@ -94,12 +640,20 @@ def setup_totp():
     print(f"[INFO] Scan the QR code in your Authenticator app. Backup Secret: {secret}")
     return True
 
-def totp_verify(code):
+def load_totp_secret():
     if not os.path.exists(TOTP_SECRET_FILE):
-        return False
+        return None
 
     with open(TOTP_SECRET_FILE, "r") as f:
-        secret = decrypt(f.read())
+        return decrypt(f.read())
+
+@traced()
+def totp_verify(code):
+    import pyotp
+
+    secret = load_totp_secret()
+    if secret is None:
+        return False
 
     totp = pyotp.TOTP(secret)
     return totp.verify(code)
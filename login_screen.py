@@ -1,4 +1,5 @@
 import os
+import time
 import hashlib
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QGraphicsDropShadowEffect, QFrame
@@ -7,6 +8,10 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer
 from PySide6.QtGui import QPixmap, QColor
 from totp_screen import TotpScreen
+from vault_metrics import counter
+from logic import get_fernet
+
+_unlock_failures = counter("aegisvault_unlock_failures_total", "Rejected master passwords.")
 
 class LoginScreen(QWidget):
     def __init__(self, parent=None):
@@ -125,6 +130,7 @@ class LoginScreen(QWidget):
 
         # Password hash for "1" (for demonstration)
         self.correct_password_hash = hashlib.sha256("1".encode()).hexdigest()
+        self.unlock_seconds = None
 
         # Connect signals
         self.login_btn.clicked.connect(self.check_password)
@@ -136,8 +142,15 @@ class LoginScreen(QWidget):
                 self.setStyleSheet(f.read())
 
     def check_password(self):
+        start = time.perf_counter()
+        self.unlock_seconds = None
         entered_pwd = self.password_input.text()
         entered_hash = hashlib.sha256(entered_pwd.encode()).hexdigest()
+        unlocked = entered_hash == self.correct_password_hash
+        if unlocked:
+            # Loads the vault key; the app adds the first vault load to this for the unlock time.
+            get_fernet()
+            self.unlock_seconds = time.perf_counter() - start
 
         def show_message(msg, color):
             self.msg_label.setText(msg)
@@ -152,10 +165,11 @@ class LoginScreen(QWidget):
             animation.setEasingCurve(QEasingCurve.OutCubic)
             animation.start(QPropertyAnimation.DeleteWhenStopped)
 
-        if entered_hash == self.correct_password_hash:
-            
+        if unlocked:
+
             QTimer.singleShot(800, self.show_totp_screen)  # Add a short delay for UX
         else:
+            _unlock_failures.inc()
             show_message("Incorrect Master Password.", "#FF6666")
             self.password_input.clear()
 
@@ -4,6 +4,15 @@ from login_screen import LoginScreen
 from totp_screen import TotpScreen
 from main_app_screen import MainAppScreen
 from vault_viewer import VaultViewerScreen
+from health_dashboard import HealthDashboardScreen
+from vault_metrics import MetricsExporter, histogram
+from vault_tasks import run_in_background
+from logic import seal_vault, VAULT_DIR
+
+_unlock_latency = histogram(
+    "aegisvault_unlock_seconds",
+    "Time to unlock: master password check and key load, plus the first vault load and decrypt after it."
+)
 
 
 class AegisVaultApp(QStackedWidget):
@@ -15,26 +24,54 @@ class AegisVaultApp(QStackedWidget):
         self.totp_screen = TotpScreen(self)
         self.main_screen = MainAppScreen(self)
         self.vault_viewer_screen = VaultViewerScreen(self)
+        self.health_screen = HealthDashboardScreen(self.vault_viewer_screen.health, self)
 
         # Add screens to stack
         self.addWidget(self.login_screen)
         self.addWidget(self.totp_screen)
         self.addWidget(self.main_screen)
         self.addWidget(self.vault_viewer_screen)
+        self.addWidget(self.health_screen)
 
         # Start with Login Screen
         self.setCurrentWidget(self.login_screen)
 
         # Button connections
         self.login_screen.login_btn.clicked.connect(self.show_totp_screen)
-        self.totp_screen.verify_btn.clicked.connect(self.verify_totp)
 
         self.main_screen.logout_btn.clicked.connect(self.show_login_screen)
         self.main_screen.vaults_btn.clicked.connect(self.show_vaults_screen)
 
         self.vault_viewer_screen.close_btn.clicked.connect(self.show_main_screen)
+        self.vault_viewer_screen.health_btn.clicked.connect(self.show_health_screen)
+
+        # Entries saved before metadata encryption are sealed once the vault is unlocked.
+        self.totp_screen.verifier.verified.connect(self.seal_stored_metadata)
+
+        # The unlock time leaves out the TOTP prompt: the login screen's part
+        # waits for the first vault load, or is recorded alone if none is needed.
+        self.pending_unlock = None
+        self.totp_screen.verifier.verified.connect(self.start_unlock)
+        self.vault_viewer_screen.vault_loaded.connect(self.finish_unlock)
+
+    def start_unlock(self):
+        self.pending_unlock = self.login_screen.unlock_seconds
+
+    def finish_unlock(self, load_seconds=0.0):
+        if self.pending_unlock is not None:
+            _unlock_latency.record(self.pending_unlock + load_seconds)
+            self.pending_unlock = None
+
+    def seal_stored_metadata(self):
+        run_in_background(seal_vault, write_path=VAULT_DIR).then(
+            None, lambda error: print(f"[WARN] Could not seal vault metadata: {error}")
+        )
 
     def show_login_screen(self):
+        self.finish_unlock()
+        # Logging out ends the unlock session: drop the cached TOTP secret.
+        self.totp_screen.verifier.lock_session()
+        self.vault_viewer_screen.code_scheduler.lock_session()
         self.login_screen.password_input.clear()
         self.setCurrentWidget(self.login_screen)
 
@@ -42,26 +79,31 @@ class AegisVaultApp(QStackedWidget):
         self.totp_screen.totp_input.clear()
         self.setCurrentWidget(self.totp_screen)
 
-    def verify_totp(self):
-        entered_code = self.totp_screen.totp_input.text().strip()
-        if entered_code == "123456":  # Replace with real TOTP logic
-            self.show_main_screen()
-        else:
-            self.totp_screen.show_invalid_message()
-
     def show_main_screen(self):
         self.main_screen.app_input.clear()
         self.main_screen.username_input.clear()
         self.main_screen.password_input.clear()
+        self.main_screen.otp_input.clear()
+        self.main_screen.url_input.clear()
         self.setCurrentWidget(self.main_screen)
 
     def show_vaults_screen(self):
-        self.vault_viewer_screen.load_vault_entries()
+        # Shards are mounted on first view; after that the file watcher keeps the viewer in sync.
+        if not self.vault_viewer_screen.ensure_mounted():
+            self.finish_unlock()
         self.setCurrentWidget(self.vault_viewer_screen)
 
+    def show_vault_viewer_screen(self):
+        # Back from the dashboard: the viewer is already loaded, no need to decrypt again.
+        self.setCurrentWidget(self.vault_viewer_screen)
+
+    def show_health_screen(self):
+        self.setCurrentWidget(self.health_screen)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    MetricsExporter().start()
     window = AegisVaultApp()
     window.setWindowTitle("AegisVault")
     window.resize(800, 600)
@@ -1,10 +1,15 @@
 import os
-from password_generator import generate_password
-from logic import add_password_entry  # <-- Import this!
+from password_generator import generator_for
+from passphrase import generate_passphrase, default_wordlist
+from logic import add_password_entry, VAULT_DIR  # <-- Import this!
+from vault_tasks import run_in_background
+from authenticator import parse_otp
+from vault_domains import parse_url
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QHBoxLayout, QMessageBox
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QHBoxLayout, QMessageBox,
+    QToolButton, QMenu
 )
-from PySide6.QtGui import QAction, QPixmap, QIcon
+from PySide6.QtGui import QAction, QActionGroup, QPixmap, QIcon
 from PySide6.QtCore import Qt
 
 class MainAppScreen(QWidget):
@@ -105,14 +110,67 @@ class MainAppScreen(QWidget):
         """)
         self.generate_password_btn.clicked.connect(self.fill_generated_password)
 
+        # Passphrase button: click generates, the arrow menu holds the options
+        self.passphrase_btn = QToolButton()
+        self.passphrase_btn.setText("Aa")
+        self.passphrase_btn.setToolTip("Generate Passphrase")
+        self.passphrase_btn.setFixedHeight(35)
+        self.passphrase_btn.setPopupMode(QToolButton.MenuButtonPopup)
+        self.passphrase_btn.setStyleSheet("""
+            QToolButton {
+                border: none;
+                background-color: transparent;
+                color: #78A083;
+                font-weight: 700;
+            }
+            QToolButton:hover {
+                background-color: #78A083;
+                color: #344955;
+                border-radius: 5px;
+            }
+        """)
+        passphrase_menu = QMenu(self.passphrase_btn)
+        self.capitalize_action = passphrase_menu.addAction("Capitalize Words")
+        self.capitalize_action.setCheckable(True)
+        self.add_digit_action = passphrase_menu.addAction("Add a Digit")
+        self.add_digit_action.setCheckable(True)
+        passphrase_menu.addSeparator()
+        self.separator_group = QActionGroup(self.passphrase_btn)
+        for label, separator in (("Separator: -", "-"), ("Separator: Space", " "), ("Separator: .", ".")):
+            action = passphrase_menu.addAction(label)
+            action.setCheckable(True)
+            action.setData(separator)
+            action.setChecked(separator == "-")
+            self.separator_group.addAction(action)
+        self.passphrase_btn.setMenu(passphrase_menu)
+        self.passphrase_btn.clicked.connect(self.fill_generated_passphrase)
+
         # Layout for password + generate button
         password_layout = QHBoxLayout()
         password_layout.setContentsMargins(0, 0, 0, 0)
         password_layout.setSpacing(6)
         password_layout.addWidget(self.password_input)
         password_layout.addWidget(self.generate_password_btn)
+        password_layout.addWidget(self.passphrase_btn)
         right_layout.addLayout(password_layout)
 
+        # Optional authenticator key (otpauth:// URI or base32 secret)
+        self.otp_input = QLineEdit()
+        self.otp_input.setPlaceholderText("Authenticator Key (optional)")
+        self.otp_input.setEchoMode(QLineEdit.Password)
+        self.otp_input.setFixedHeight(40)
+        self.otp_input.setStyleSheet(self.input_style())
+        add_icon_to_lineedit(self.otp_input, os.path.join("assets", "password.png"))
+        right_layout.addWidget(self.otp_input)
+
+        # Website input, for quick fill
+        self.url_input = QLineEdit()
+        self.url_input.setPlaceholderText("Website URL (optional)")
+        self.url_input.setFixedHeight(40)
+        self.url_input.setStyleSheet(self.input_style())
+        add_icon_to_lineedit(self.url_input, os.path.join("assets", "app.png"))
+        right_layout.addWidget(self.url_input)
+
         top_layout.addLayout(right_layout)
         main_layout.addLayout(top_layout)
 
@@ -262,22 +320,70 @@ class MainAppScreen(QWidget):
         """
 
     def fill_generated_password(self):
-        new_password = generate_password()
+        new_password = generator_for(self.app_input.text()).generate()
         self.password_input.setText(new_password)
 
+    def fill_generated_passphrase(self):
+        # The wordlist is only mapped the first time this mode is used.
+        if not default_wordlist.available():
+            QMessageBox.warning(
+                self, "Wordlist Missing",
+                "No wordlist found. Run 'python passphrase.py <eff_large_wordlist.txt>' to create one."
+            )
+            return
+        new_passphrase = generate_passphrase(
+            separator=self.separator_group.checkedAction().data(),
+            capitalize=self.capitalize_action.isChecked(),
+            add_digit=self.add_digit_action.isChecked()
+        )
+        self.password_input.setText(new_passphrase)
+
     def save_entry(self):
         app = self.app_input.text().strip()
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
+        otp_key = self.otp_input.text().strip()
+        url = self.url_input.text().strip()
         vault = self.vault_dropdown.currentText()
 
         if not app or not username or not password:
             QMessageBox.warning(self, "Incomplete Data", "Please fill all fields.")
             return
 
-        # Actually save the entry!
-        add_password_entry(app, username, password, vault)
+        if otp_key:
+            try:
+                parse_otp(otp_key)
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid Authenticator Key", str(e))
+                return
+
+        if url:
+            try:
+                parse_url(url)
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid Website", str(e))
+                return
+
+        # Actually save the entry! Encryption and file I/O run off the GUI thread.
+        self.set_busy(True)
+        run_in_background(
+            add_password_entry, app, username, password, vault, totp=otp_key or None,
+            urls=[url] if url else None, write_path=VAULT_DIR
+        ).then(
+            lambda result: self.on_entry_saved(app, username, vault),
+            self.on_save_failed
+        )
+
+    def set_busy(self, busy):
+        self.save_btn.setEnabled(not busy)
+        self.save_btn.setText("Saving..." if busy else "Save Entry")
+        if busy:
+            self.setCursor(Qt.BusyCursor)
+        else:
+            self.unsetCursor()
 
+    def on_entry_saved(self, app, username, vault):
+        self.set_busy(False)
         QMessageBox.information(
             self,
             "Entry Saved",
@@ -286,6 +392,12 @@ class MainAppScreen(QWidget):
         self.app_input.clear()
         self.username_input.clear()
         self.password_input.clear()
+        self.otp_input.clear()
+        self.url_input.clear()
+
+    def on_save_failed(self, error):
+        self.set_busy(False)
+        QMessageBox.warning(self, "Save Failed", f"Could not save the entry:\n{error}")
 
     def logout(self):
         if self.parent() and hasattr(self.parent(), "show_login_screen"):
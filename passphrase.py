@@ -0,0 +1,101 @@
+import os
+import mmap
+import struct
+import secrets
+
+# ------------------ File Paths ------------------
+
+WORDLIST_FILE = "wordlist.bin"
+
+# ------------------ On-disk Layout ------------------
+#
+# 16 byte header (magic, slot width, word count) followed by one NUL-padded
+# fixed-width slot per word, so word i is a single read at HEADER + i * width.
+
+WORDLIST_MAGIC = b"AVWL"
+WORDLIST_HEADER = struct.Struct(">4sB3xQ")
+
+
+def build_wordlist(source_path, wordlist_path=WORDLIST_FILE):
+    """Converts an EFF-style wordlist ("11111<TAB>word" or one word per line) to the binary layout."""
+    words = []
+    with open(source_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                words.append(parts[-1].encode("utf-8"))
+    if not words:
+        raise ValueError(f"No words found in {source_path}.")
+    width = max(len(word) for word in words)
+    if width > 255:
+        raise ValueError("Words longer than 255 bytes are not supported.")
+    with open(wordlist_path, "wb") as f:
+        f.write(WORDLIST_HEADER.pack(WORDLIST_MAGIC, width, len(words)))
+        for word in words:
+            f.write(word.ljust(width, b"\0"))
+
+
+class Wordlist:
+    """Memory-mapped fixed-width wordlist; nothing is read until the first lookup."""
+
+    def __init__(self, path=WORDLIST_FILE):
+        self.path = path
+        self._map = None
+
+    def _open(self):
+        if self._map is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"Wordlist not found: {self.path}")
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self._width, self._count = WORDLIST_HEADER.unpack_from(self._map, 0)
+            if (magic != WORDLIST_MAGIC or self._count == 0
+                    or len(self._map) < WORDLIST_HEADER.size + self._count * self._width):
+                self.close()
+                raise ValueError(f"{self.path} is not a wordlist file.")
+        return self._map
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def __len__(self):
+        self._open()
+        return self._count
+
+    def word(self, index):
+        data = self._open()
+        if not 0 <= index < self._count:
+            raise IndexError(f"Word index {index} out of range for {self._count} words")
+        offset = WORDLIST_HEADER.size + index * self._width
+        return data[offset:offset + self._width].rstrip(b"\0").decode("utf-8")
+
+    def random_word(self):
+        return self.word(secrets.randbelow(len(self)))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+default_wordlist = Wordlist()
+
+def generate_passphrase(words=6, separator="-", capitalize=False, add_digit=False, wordlist=None):
+    if wordlist is None:   # not `or`: truthiness would call __len__ and map the file
+        wordlist = default_wordlist
+    chosen = [wordlist.random_word() for _ in range(words)]
+    if capitalize:
+        chosen = [word.capitalize() for word in chosen]
+    if add_digit and chosen:
+        index = secrets.randbelow(len(chosen))
+        chosen[index] += str(secrets.randbelow(10))
+    return separator.join(chosen)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 2:
+        print("Usage: python passphrase.py <eff_large_wordlist.txt>")
+        sys.exit(1)
+    build_wordlist(sys.argv[1])
+    print(f"[INFO] Wrote {WORDLIST_FILE}")
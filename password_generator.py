@@ -1,6 +1,204 @@
+import os
 import string
-import random
+import secrets
+import weakref
+import threading
 
-def generate_password(length=16):
-    characters = string.ascii_letters + string.digits + "!@#$%^&*()-_=+"
-    return ''.join(random.SystemRandom().choice(characters) for _ in range(length))
+DEFAULT_SYMBOLS = "!@#$%^&*()-_=+"
+AMBIGUOUS_CHARACTERS = "Il1|O0o`'\""
+
+# Bytes pulled from os.urandom per refill of a pool.
+URANDOM_CHUNK = 64 * 1024
+
+
+# ------------------ Unbiased Byte Pools ------------------
+
+class _AlphabetPool:
+    """Buffered stream of uniform symbols from a fixed alphabet of up to 256 bytes.
+
+    Random bytes at or above the largest multiple of the alphabet size are
+    deleted before mapping, so `b % n` never favours the low symbols. The
+    filtering and mapping run inside bytes.translate, not in Python.
+    Pools are shared by the cached generators, so take() holds a lock, and
+    a forked child drops every buffer instead of replaying the parent's.
+    """
+
+    def __init__(self, alphabet):
+        size = len(alphabet)
+        if not 0 < size <= 256:
+            raise ValueError("Alphabet must contain between 1 and 256 symbols.")
+        limit = 256 - 256 % size
+        self._table = bytes(alphabet[b % size] for b in range(256))
+        self._reject = bytes(range(limit, 256))
+        self._reset()
+        _live_pools.add(self)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._buffer = b""
+        self._pos = 0
+
+    def take(self, count):
+        with self._lock:
+            end = self._pos + count
+            if end > len(self._buffer):
+                fresh = [self._buffer[self._pos:]]
+                have = len(fresh[0])
+                while have < count:
+                    chunk = os.urandom(max(URANDOM_CHUNK, 2 * (count - have))).translate(self._table, self._reject)
+                    fresh.append(chunk)
+                    have += len(chunk)
+                self._buffer = b"".join(fresh)
+                self._pos, end = 0, count
+            result = self._buffer[self._pos:end]
+            self._pos = end
+            return result
+
+
+_live_pools = weakref.WeakSet()
+
+def _reset_pools_after_fork():
+    # The child must not hand out bytes the parent may also use; its lock
+    # may have been held by another thread at fork time, so it is replaced too.
+    for pool in list(_live_pools):
+        pool._reset()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+class _RandomSource:
+    def __init__(self):
+        self._pools = {}
+
+    def pool(self, alphabet):
+        pool = self._pools.get(alphabet)
+        if pool is None:
+            pool = self._pools[alphabet] = _AlphabetPool(alphabet)
+        return pool
+
+    def below(self, n, count):
+        """`count` uniform integers in [0, n)."""
+        if n == 1:
+            return bytes(count)
+        if n > 256:
+            # Only very long passwords get here; one symbol per pool byte can't cover n.
+            return [secrets.randbelow(n) for _ in range(count)]
+        return self.pool(bytes(range(n))).take(count)
+
+
+# ------------------ Policies ------------------
+
+class PasswordPolicy:
+    """Character classes, required classes and length range for one site."""
+
+    def __init__(self, min_length=16, max_length=None, lowercase=True, uppercase=True,
+                 digits=True, symbols=DEFAULT_SYMBOLS, require_each_class=True,
+                 exclude_ambiguous=False, exclude=""):
+        self.min_length = min_length
+        self.max_length = min_length if max_length is None else max_length
+        removed = set(exclude) | (set(AMBIGUOUS_CHARACTERS) if exclude_ambiguous else set())
+
+        classes = []
+        for enabled, chars in ((lowercase, string.ascii_lowercase),
+                               (uppercase, string.ascii_uppercase),
+                               (digits, string.digits),
+                               (bool(symbols), symbols or "")):
+            if enabled:
+                kept = "".join(dict.fromkeys(c for c in chars if c not in removed))
+                if kept:
+                    classes.append(kept.encode("ascii"))
+        if not classes:
+            raise ValueError("Password policy leaves no characters to choose from.")
+
+        self.classes = classes
+        self.alphabet = b"".join(classes)
+        self.required = classes if require_each_class else []
+
+        if self.min_length < len(self.required):
+            raise ValueError("Minimum length is shorter than the number of required character classes.")
+        if self.max_length < self.min_length:
+            raise ValueError("Length range must satisfy min_length <= max_length.")
+
+
+# Per-site overrides, keyed by lower-cased application name.
+SITE_POLICIES = {}
+DEFAULT_POLICY = PasswordPolicy()
+
+def policy_for(app_name=None):
+    return SITE_POLICIES.get((app_name or "").strip().lower(), DEFAULT_POLICY)
+
+
+# ------------------ Generator ------------------
+
+class PasswordGenerator:
+    """Draws randomness in bulk from os.urandom and maps it onto a policy.
+
+    Required classes are satisfied by construction: the password is filled
+    from the full alphabet, then one symbol of each required class is
+    written to a distinct random position (a partial Fisher-Yates shuffle).
+    Nothing is ever generated and thrown away for failing the policy.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy or PasswordPolicy()
+        self._random = _RandomSource()
+
+    def generate(self):
+        return self.generate_many(1)[0]
+
+    def generate_many(self, n):
+        policy = self.policy
+        if policy.min_length == policy.max_length:
+            return self._generate_length(n, policy.min_length)
+        # Passwords of each drawn length are made together, then put back in draw order.
+        lengths = self._random.below(policy.max_length - policy.min_length + 1, n)
+        by_length = {}
+        for index, extra in enumerate(lengths):
+            by_length.setdefault(policy.min_length + extra, []).append(index)
+        passwords = [None] * n
+        for length, indices in by_length.items():
+            for index, password in zip(indices, self._generate_length(len(indices), length)):
+                passwords[index] = password
+        return passwords
+
+    def _generate_length(self, n, length):
+        source, policy = self._random, self.policy
+        # Every byte the batch needs comes from the pools up front; the loop
+        # below only writes each required symbol to its drawn position.
+        blob = bytearray(source.pool(policy.alphabet).take(n * length))
+        draws = [(source.pool(chars).take(n), source.below(length - k, n))
+                 for k, chars in enumerate(policy.required)]
+        if draws:
+            for i in range(n):
+                base = i * length
+                swapped = {}
+                for k, (symbols, offsets) in enumerate(draws):
+                    j = k + offsets[i]
+                    position = swapped.get(j, j)
+                    swapped[j] = swapped.get(k, k)
+                    blob[base + position] = symbols[i]
+        text = blob.decode("ascii")
+        return [text[i:i + length] for i in range(0, n * length, length)]
+
+
+_policy_generators = weakref.WeakKeyDictionary()
+
+def generator_for(app_name=None):
+    """The cached generator for a site's policy, so its pools are refilled rather than rebuilt per call."""
+    policy = policy_for(app_name)
+    generator = _policy_generators.get(policy)
+    if generator is None:
+        generator = _policy_generators[policy] = PasswordGenerator(policy)
+    return generator
+
+
+_default_generators = {}
+
+def generate_password(length=16, symbols=DEFAULT_SYMBOLS):
+    key = (length, symbols)
+    generator = _default_generators.get(key)
+    if generator is None:
+        policy = PasswordPolicy(min_length=length, symbols=symbols, require_each_class=length >= 4)
+        generator = _default_generators[key] = PasswordGenerator(policy)
+    return generator.generate()
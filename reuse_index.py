@@ -0,0 +1,78 @@
+def _key(fingerprint):
+    # The first 128 bits, as bytes: a third of the hex string's size, and
+    # still far too wide for two different passwords to collide.
+    return bytes.fromhex(fingerprint[:32])
+
+
+class ReuseIndex:
+    """Groups entries by password fingerprint so reuse lookups are O(1).
+
+    Only keyed fingerprints (see logic.password_fingerprint) are ever held
+    here, never the plaintext passwords themselves. Most passwords are
+    unique, so a fingerprint held by one entry maps straight to its ID and
+    only shared ones get a set.
+    """
+
+    def __init__(self):
+        self._single = {}    # fingerprint key -> the one entry id holding it
+        self._groups = {}    # fingerprint key -> set of two or more entry ids
+        self._by_entry = {}  # entry id -> fingerprint key
+
+    def add(self, entry_id, fingerprint):
+        """Indexes an entry; a None fingerprint (password unreadable) leaves it out of every group."""
+        if entry_id in self._by_entry:
+            self.remove(entry_id)
+        if fingerprint is None:
+            return
+        key = _key(fingerprint)
+        self._by_entry[entry_id] = key
+        group = self._groups.get(key)
+        if group is not None:
+            group.add(entry_id)
+        elif key in self._single:
+            self._groups[key] = {self._single.pop(key), entry_id}
+        else:
+            self._single[key] = entry_id
+
+    def remove(self, entry_id):
+        key = self._by_entry.pop(entry_id, None)
+        if key is None:
+            return
+        group = self._groups.get(key)
+        if group is None:
+            del self._single[key]
+            return
+        group.discard(entry_id)
+        if len(group) == 1:
+            self._single[key] = group.pop()
+            del self._groups[key]
+
+    def update(self, entry_id, fingerprint):
+        self.add(entry_id, fingerprint)
+
+    def count(self, entry_id):
+        """Number of entries sharing this entry's password (1 means unique)."""
+        key = self._by_entry.get(entry_id)
+        if key is None:
+            return 0
+        group = self._groups.get(key)
+        return 1 if group is None else len(group)
+
+    def members(self, entry_id):
+        """IDs of the entries sharing this entry's password, itself included (a new set)."""
+        key = self._by_entry.get(entry_id)
+        if key is None:
+            return set()
+        group = self._groups.get(key)
+        return {entry_id} if group is None else set(group)
+
+    def is_reused(self, entry_id):
+        return self.count(entry_id) > 1
+
+    def clear(self):
+        self._single.clear()
+        self._groups.clear()
+        self._by_entry.clear()
+
+    def __len__(self):
+        return len(self._by_entry)
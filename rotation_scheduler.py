@@ -0,0 +1,155 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# ------------------ Rotation Policies ------------------
+
+# Days before a password should be rotated, per vault.
+DEFAULT_ROTATION_DAYS = 180
+ROTATION_POLICIES = {
+    "Personal": 180,
+    "Work": 180,
+    "Bank": 180,
+    "Ghost": 180,
+}
+# How long before the due date an entry shows up in due_soon().
+DUE_SOON_WINDOW = timedelta(days=14)
+
+# Longest interval a QTimer accepts, in milliseconds.
+MAX_TIMER_MS = 2 ** 31 - 1
+
+STAGE_SOON = 0
+STAGE_DUE = 1
+
+
+def parse_date_added(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+class RotationScheduler(QObject):
+    """Keeps entries in a heap ordered by their next rotation threshold.
+
+    Dates are parsed once in load()/add(); after that a single timer wakes
+    at the next threshold, so nothing scans the vault on repaint.
+    """
+
+    entry_due_soon = Signal(str)
+    entry_due = Signal(str)
+
+    def __init__(self, policies=None, parent=None):
+        super().__init__(parent)
+        self.policies = dict(ROTATION_POLICIES if policies is None else policies)
+        self._heap = []           # (when, generation, entry_id, stage)
+        self._generation = {}     # entry id -> generation of its live heap items
+        self._sequence = itertools.count(1)   # never reused, so a removed entry's items stay stale
+        self._added = {}          # entry id -> parsed date_added
+        self._vault = {}          # entry id -> vault name
+        self._due_soon = {}       # entry id -> due date, insertion ordered
+        self._due = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._process)
+
+    def policy_days(self, vault):
+        return self.policies.get(vault, DEFAULT_ROTATION_DAYS)
+
+    def set_policy(self, vault, days):
+        self.policies[vault] = days
+        for entry_id, entry_vault in list(self._vault.items()):
+            if entry_vault == vault:
+                self._schedule(entry_id)
+        self._process()
+
+    def load(self, entries):
+        self.clear()
+        for entry in entries:
+            self._track(entry)
+        self._process()
+
+    def add(self, entry):
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        for entry in entries:
+            self._track(entry)
+        self._process()
+
+    def remove(self, entry_id):
+        # Heap items are dropped lazily once their generation goes stale,
+        # or all at once by _compact() when they pile up.
+        self._generation.pop(entry_id, None)
+        self._added.pop(entry_id, None)
+        self._vault.pop(entry_id, None)
+        self._due_soon.pop(entry_id, None)
+        self._due.discard(entry_id)
+
+    def clear(self):
+        self._heap.clear()
+        self._generation.clear()
+        self._added.clear()
+        self._vault.clear()
+        self._due_soon.clear()
+        self._due.clear()
+        self._timer.stop()
+
+    def added_at(self, entry_id):
+        return self._added.get(entry_id)
+
+    def due_date(self, entry_id):
+        added = self._added.get(entry_id)
+        if added is None:
+            return None
+        return added + timedelta(days=self.policy_days(self._vault[entry_id]))
+
+    def is_due(self, entry_id):
+        return entry_id in self._due
+
+    def due_soon(self):
+        """Entries inside the warning window or past due, maintained as thresholds pass."""
+        return self._due_soon.keys()
+
+    def _track(self, entry):
+        entry_id = entry["id"]
+        self._added[entry_id] = parse_date_added(entry.get("date_added"))
+        self._vault[entry_id] = entry.get("vault", "")
+        self._schedule(entry_id)
+
+    def _schedule(self, entry_id):
+        generation = next(self._sequence)
+        self._generation[entry_id] = generation
+        self._due_soon.pop(entry_id, None)
+        self._due.discard(entry_id)
+        due = self.due_date(entry_id)
+        heapq.heappush(self._heap, (due - DUE_SOON_WINDOW, generation, entry_id, STAGE_SOON))
+        if len(self._heap) > 2 * len(self._generation) + 64:
+            self._compact()
+
+    def _compact(self):
+        # Every edit re-schedules its entry; rebuild once stale items outnumber live ones.
+        generation = self._generation
+        self._heap = [item for item in self._heap if generation.get(item[2]) == item[1]]
+        heapq.heapify(self._heap)
+
+    def _process(self):
+        now = datetime.now()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, generation, entry_id, stage = heapq.heappop(heap)
+            if self._generation.get(entry_id) != generation:
+                continue
+            if stage == STAGE_SOON:
+                due = when + DUE_SOON_WINDOW
+                self._due_soon[entry_id] = due
+                heapq.heappush(heap, (due, generation, entry_id, STAGE_DUE))
+                self.entry_due_soon.emit(entry_id)
+            else:
+                self._due.add(entry_id)
+                self.entry_due.emit(entry_id)
+        self._timer.stop()
+        if heap:
+            delay_ms = (heap[0][0] - now).total_seconds() * 1000
+            self._timer.start(int(min(max(delay_ms, 0), MAX_TIMER_MS)))
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
 )
 from PySide6.QtCore import Qt, QTimer
-from logic import totp_verify  # Your TOTP verification function
+from totp_verifier import TotpVerifier
 
 def show_invalid_message(self):
     from PySide6.QtWidgets import QMessageBox
@@ -95,6 +95,12 @@ class TotpScreen(QWidget):
             }
         """)
 
+        # Verification runs off the GUI thread; results come back as signals
+        self.verifier = TotpVerifier(self)
+        self.verifier.verified.connect(self.on_verified)
+        self.verifier.rejected.connect(self.on_rejected)
+        self.verifier.locked_out.connect(self.on_locked_out)
+
         # Connect signals
         self.verify_btn.clicked.connect(self.check_totp)
         self.totp_input.returnPressed.connect(self.verify_btn.click)
@@ -104,11 +110,27 @@ class TotpScreen(QWidget):
 
     def check_totp(self):
         entered_code = self.totp_input.text().strip()
-        if totp_verify(entered_code):
-            QMessageBox.information(self, "Success", "TOTP verified! Access granted.")
-            if self.parent() and hasattr(self.parent(), "show_main_screen"):
-                self.parent().show_main_screen()
+        self.verify_btn.setEnabled(False)
+        self.verifier.verify(entered_code)
+        if not self.verifier.is_busy():
+            self.verify_btn.setEnabled(not self.verifier.seconds_locked())
+
+    def on_verified(self):
+        self.verify_btn.setEnabled(True)
+        QMessageBox.information(self, "Success", "TOTP verified! Access granted.")
+        if self.parent() and hasattr(self.parent(), "show_main_screen"):
+            self.parent().show_main_screen()
+
+    def on_rejected(self, message):
+        remaining = self.verifier.seconds_locked()
+        if remaining:
+            QTimer.singleShot(remaining * 1000, lambda: self.verify_btn.setEnabled(True))
         else:
-            QMessageBox.warning(self, "Error", "Invalid TOTP code. Please try again.")
-            self.totp_input.clear()
-            self.totp_input.setFocus()
+            self.verify_btn.setEnabled(True)
+        QMessageBox.warning(self, "Error", message)
+        self.totp_input.clear()
+        self.totp_input.setFocus()
+
+    def on_locked_out(self, seconds):
+        QTimer.singleShot(seconds * 1000, lambda: self.verify_btn.setEnabled(True))
+        QMessageBox.warning(self, "Error", f"Too many attempts. Try again in {seconds} seconds.")
@@ -0,0 +1,140 @@
+import time
+import hmac
+import threading
+import pyotp
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from logic import load_totp_secret
+from vault_metrics import histogram, counter
+
+# ------------------ Settings ------------------
+
+VALID_WINDOW = 1          # accept codes from one step either side of now
+FREE_ATTEMPTS = 3         # failures allowed before backoff starts
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 300
+STEP_SECONDS = 30         # pyotp's default interval, used to trim the replay set between sessions
+
+_verify_latency = histogram("aegisvault_totp_verify_seconds", "Time from submitting a TOTP code to its verdict.")
+_verify_failures = counter("aegisvault_totp_failures_total", "Rejected TOTP codes, including malformed and replayed ones.")
+
+
+class _VerifySignals(QObject):
+    finished = Signal(object, object)   # (matched time step or None, error or None)
+
+
+class _VerifyTask(QRunnable):
+    def __init__(self, verifier, code, now):
+        super().__init__()
+        self.verifier = verifier
+        self.code = code
+        self.now = now
+        self.signals = _VerifySignals()
+
+    def run(self):
+        try:
+            step = self.verifier._match(self.code, self.now)
+        except Exception as e:
+            self.signals.finished.emit(None, e)
+        else:
+            self.signals.finished.emit(step, None)
+
+
+class TotpVerifier(QObject):
+    """Verifies TOTP codes off the GUI thread for one unlock session.
+
+    The secret is decrypted on the first attempt and kept until
+    lock_session(). Accepted codes are remembered by time step so they can't
+    be replayed inside their window, and repeated failures back off
+    exponentially; both outlive lock_session(), so logging out and back in
+    neither reopens a used code nor resets the backoff.
+    """
+
+    verified = Signal()
+    rejected = Signal(str)
+    locked_out = Signal(int)     # seconds until the next attempt is allowed
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._totp = None
+        self._secret_lock = threading.Lock()
+        self._used = {}            # time step -> set of codes already accepted
+        self._failures = 0
+        self._locked_until = 0.0
+        self._pending = None
+        self._started = 0.0
+
+    # --- Session ---
+    def lock_session(self):
+        with self._secret_lock:
+            self._totp = None
+        self._forget_old_steps(int(time.time() // STEP_SECONDS))
+
+    def seconds_locked(self):
+        return max(0, int(self._locked_until - time.monotonic() + 0.999))
+
+    def is_busy(self):
+        return self._pending is not None
+
+    # --- Verification ---
+    def verify(self, code):
+        remaining = self.seconds_locked()
+        if remaining:
+            self.locked_out.emit(remaining)
+            return
+        if self._pending is not None:
+            return
+        code = code.strip()
+        if len(code) != 6 or not code.isdigit():
+            self._record_failure("Enter the 6-digit code from your authenticator app.")
+            return
+        task = _VerifyTask(self, code, time.time())
+        task.signals.finished.connect(lambda step, error: self._finish(code, step, error))
+        self._pending = task
+        self._started = time.perf_counter()
+        QThreadPool.globalInstance().start(task)
+
+    def _match(self, code, now):
+        # Runs on a pool thread: decrypts the secret at most once per session.
+        with self._secret_lock:
+            if self._totp is None:
+                secret = load_totp_secret()
+                if secret is None:
+                    raise RuntimeError("TOTP has not been set up.")
+                self._totp = pyotp.TOTP(secret)
+            totp = self._totp
+        current = int(now // totp.interval)
+        for offset in range(-VALID_WINDOW, VALID_WINDOW + 1):
+            step = current + offset
+            if hmac.compare_digest(totp.generate_otp(step), code):
+                return step
+        return None
+
+    def _finish(self, code, step, error):
+        _verify_latency.record(time.perf_counter() - self._started)
+        self._pending = None
+        if error is not None:
+            self.rejected.emit(str(error))
+            return
+        if step is None:
+            self._record_failure("Invalid TOTP code. Please try again.")
+            return
+        self._forget_old_steps(step)
+        if code in self._used.get(step, ()):
+            self._record_failure("This code was already used. Wait for the next one.")
+            return
+        self._used.setdefault(step, set()).add(code)
+        self._failures = 0
+        self.verified.emit()
+
+    def _forget_old_steps(self, step):
+        for old in [s for s in self._used if s < step - 2 * VALID_WINDOW]:
+            del self._used[old]
+
+    def _record_failure(self, message):
+        _verify_failures.inc()
+        self._failures += 1
+        if self._failures > FREE_ATTEMPTS:
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (self._failures - FREE_ATTEMPTS - 1), BACKOFF_MAX_SECONDS)
+            self._locked_until = time.monotonic() + delay
+            message += f" Too many attempts, try again in {delay} seconds."
+        self.rejected.emit(message)
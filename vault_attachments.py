@@ -0,0 +1,222 @@
+import os
+import hmac
+import struct
+import hashlib
+import tempfile
+
+# ------------------ Stream Format ------------------
+#
+# Attachments are encrypted in fixed-size chunks with AES-256-GCM, so files
+# of any size are processed in constant memory and any chunk can be read
+# on its own. The layout follows the STREAM construction:
+#
+#   header  = MAGIC | version (1 byte) | chunk size (4 bytes) | salt (16 bytes)
+#   chunk i = AES-GCM(file key, nonce_i, plaintext_i, aad=header), 16-byte tag
+#
+# The file key is HMAC(attachment key, salt), and nonce_i is the chunk
+# counter (11 bytes) followed by a flag byte set only on the last chunk, so
+# chunks can't be reordered, dropped or truncated without failing to
+# decrypt. Every chunk but the last is full; an empty file is one empty
+# last chunk.
+#
+# Blobs are content addressed: a blob is named after a keyed HMAC of its
+# plain text (keyed so the name doesn't reveal which well-known file it
+# is), and identical attachments are stored once.
+
+MAGIC = b"AVA1"
+FORMAT_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+SALT_BYTES = 16
+TAG_BYTES = 16
+_HEADER = struct.Struct(">4sBI16s")
+HEADER_BYTES = _HEADER.size
+BLOB_SUFFIX = ".avc"
+
+
+class AttachmentError(ValueError):
+    """Raised for blobs that are missing, malformed or fail authentication."""
+
+
+def blob_path(directory, address):
+    """Where a blob lives; needs no key, so copies can be moved between vault directories."""
+    if len(address) != 64 or not all(c in "0123456789abcdef" for c in address):
+        raise AttachmentError(f"Not an attachment address: {address!r}")
+    return os.path.join(directory, address[:2], address + BLOB_SUFFIX)
+
+
+def _nonce(index, last):
+    return index.to_bytes(11, "big") + (b"\x01" if last else b"\x00")
+
+
+def _aead(key):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key)
+
+
+def _file_key(key, salt):
+    return hmac.new(key, b"aegisvault-attachment-file\0" + salt, hashlib.sha256).digest()
+
+
+def _read_full(f, size):
+    data = f.read(size)
+    while len(data) < size:
+        more = f.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def encrypt_stream(src, dst, key, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Encrypts the binary file object src into dst; returns the plain-text size.
+
+    on_chunk sees every plain-text chunk, e.g. to hash the content on the way through.
+    """
+    salt = os.urandom(SALT_BYTES)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, chunk_size, salt)
+    aead = _aead(_file_key(key, salt))
+    dst.write(header)
+
+    size, index = 0, 0
+    chunk = _read_full(src, chunk_size)
+    while True:
+        # One chunk of read-ahead tells whether this one is the last.
+        following = _read_full(src, chunk_size) if len(chunk) == chunk_size else b""
+        last = not following
+        if on_chunk:
+            on_chunk(chunk)
+        dst.write(aead.encrypt(_nonce(index, last), chunk, header))
+        size += len(chunk)
+        if last:
+            return size
+        chunk, index = following, index + 1
+
+
+class AttachmentReader:
+    """Random-access reader over one encrypted blob; only the chunks asked for are decrypted."""
+
+    def __init__(self, path, key):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            header = _read_full(self._f, HEADER_BYTES)
+            if len(header) != HEADER_BYTES:
+                raise AttachmentError(f"{path} is too short to be an attachment.")
+            magic, version, self.chunk_size, salt = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION or not self.chunk_size:
+                raise AttachmentError(f"{path} is not a version {FORMAT_VERSION} attachment.")
+            self._header = header
+            self._aead = _aead(_file_key(key, salt))
+
+            stored = os.fstat(self._f.fileno()).st_size - HEADER_BYTES
+            sealed_chunk = self.chunk_size + TAG_BYTES
+            self.chunk_count = max(-(-stored // sealed_chunk), 1)
+            last_bytes = stored - (self.chunk_count - 1) * sealed_chunk - TAG_BYTES
+            if last_bytes < 0:
+                raise AttachmentError(f"{path} is truncated.")
+            self.size = (self.chunk_count - 1) * self.chunk_size + last_bytes
+        except Exception:
+            self._f.close()
+            raise
+
+    def read_chunk(self, index):
+        if not 0 <= index < self.chunk_count:
+            raise IndexError(index)
+        self._f.seek(HEADER_BYTES + index * (self.chunk_size + TAG_BYTES))
+        sealed = _read_full(self._f, self.chunk_size + TAG_BYTES)
+        try:
+            return self._aead.decrypt(_nonce(index, index == self.chunk_count - 1), sealed, self._header)
+        except Exception:
+            raise AttachmentError(f"Chunk {index} of {self.path} failed authentication.") from None
+
+    def read(self, offset=0, length=None):
+        """Plain-text bytes [offset, offset + length); decrypts only the chunks they span."""
+        end = self.size if length is None else min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        first, last = offset // self.chunk_size, (end - 1) // self.chunk_size
+        data = b"".join(self.read_chunk(i) for i in range(first, last + 1))
+        start = offset - first * self.chunk_size
+        return data[start:start + end - offset]
+
+    def __iter__(self):
+        for index in range(self.chunk_count):
+            yield self.read_chunk(index)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# ------------------ Content-addressed Store ------------------
+
+class AttachmentStore:
+    """Encrypted blobs under directory/<first two hex digits>/<address>.avc."""
+
+    def __init__(self, directory, key):
+        self.directory = directory
+        self.key = hmac.new(key, b"aegisvault-attachment-encryption", hashlib.sha256).digest()
+        self._address_key = hmac.new(key, b"aegisvault-attachment-address", hashlib.sha256).digest()
+
+    def path(self, address):
+        return blob_path(self.directory, address)
+
+    def exists(self, address):
+        return os.path.exists(self.path(address))
+
+    def put(self, src, chunk_size=CHUNK_SIZE):
+        """Stores the binary file object src; returns (address, size). Content already stored is kept as is."""
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hmac.new(self._address_key, digestmod=hashlib.sha256)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                size = encrypt_stream(src, dst, self.key, chunk_size, on_chunk=digest.update)
+            address = digest.hexdigest()
+            path = self.path(address)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return address, size
+
+    def open(self, address):
+        path = self.path(address)
+        if not os.path.exists(path):
+            raise AttachmentError(f"Attachment {address} is missing.")
+        return AttachmentReader(path, self.key)
+
+    def extract(self, address, dst):
+        """Decrypts a blob into the binary file object dst, one chunk at a time; returns the size."""
+        with self.open(address) as reader:
+            for chunk in reader:
+                dst.write(chunk)
+            return reader.size
+
+    def addresses(self):
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, prefix)
+            if len(prefix) == 2 and os.path.isdir(folder):
+                for name in sorted(os.listdir(folder)):
+                    if name.endswith(BLOB_SUFFIX):
+                        yield name[:-len(BLOB_SUFFIX)]
+
+    def remove(self, address):
+        try:
+            os.remove(self.path(address))
+            return True
+        except FileNotFoundError:
+            return False
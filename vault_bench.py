@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+# ------------------ Settings ------------------
+#
+# Each size runs in its own interpreter inside a scratch directory, so the
+# real vault, key and history are never touched and the peak RSS reported
+# for a size isn't inflated by the sizes before it.
+
+REPORT_FILE = "vault_bench_report.json"
+BENCH_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_SEED = 1337
+DEFAULT_REPEAT = 3
+SINGLE_RUN_SIZE = 100_000        # from this size on each operation is timed once
+ADD_COUNT = 100                  # single-record adds timed per size
+CRYPTO_COUNT = 10_000            # tokens encrypted and decrypted for the throughput figures
+TIME_TOLERANCE = 1.25            # fail when an operation is 25% slower than the baseline
+TIME_FLOOR = 0.005               # ...and slower by at least 5 ms, so tiny timings don't flap
+RSS_TOLERANCE = 1.2              # fail when peak RSS grows by more than 20%
+
+VAULTS = ("Personal", "Work", "Finance", "Social", "Shopping")
+APP_WORDS = ("mail", "cloud", "bank", "shop", "chat", "photo", "music", "video", "news", "code",
+             "drive", "pay", "travel", "health", "game", "social", "docs", "notes", "crm", "vpn")
+APP_SUFFIXES = ("", "hub", "ly", "box", "app", "io", "now", "pro", "zone", "base")
+NAME_WORDS = ("alex", "sam", "jordan", "taylor", "morgan", "casey", "riley", "jamie", "avery", "quinn")
+SEARCH_QUERIES = ("mail", "alex", "work", "zzz-no-match")
+URL_QUERIES = ("https://accounts.mailhub.com/login", "mailhub.com", "www.bankly.co.uk", "zzz-no-match.example")
+URL_HOSTS = ("", "www.", "accounts.", "login.")
+URL_SUFFIXES = ("com", "co.uk", "github.io")
+SORT_FIELDS = (("app_name", False), ("username", True), ("date_added", True))
+
+
+# ------------------ Synthetic Vaults ------------------
+
+def synthetic_rows(count, seed=DEFAULT_SEED):
+    """Plain-text rows with stable ids; the same seed always yields the same vault."""
+    from vault_store import _ulid
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    rows = []
+    for i in range(count):
+        added = start + timedelta(seconds=i * 37)
+        app = rng.choice(APP_WORDS) + rng.choice(APP_SUFFIXES)
+        rows.append({
+            "id": _ulid(int(added.timestamp() * 1000), rng.getrandbits(80)),
+            "app_name": app.capitalize(),
+            "username": f"{rng.choice(NAME_WORDS)}{rng.randrange(10_000)}@{app}.com",
+            "password": "".join(rng.choice("abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789!#$%")
+                                for _ in range(rng.randrange(12, 25))),
+            "vault": rng.choice(VAULTS),
+            "date_added": added.isoformat(),
+        })
+    return rows
+
+
+def synthetic_vault(count, seed=DEFAULT_SEED):
+    """Stored records as save_vault expects them: passwords encrypted and fingerprinted."""
+    import logic
+    records = []
+    for row in synthetic_rows(count, seed):
+        password = row["password"]
+        row["password"] = logic.encrypt(password)
+        row["fingerprint"] = logic.password_fingerprint(password)
+        row["updated_at"] = row["date_added"]
+        records.append(logic.seal_entry(row))
+    return records
+
+
+# ------------------ Measurements ------------------
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def timed(fn, repeat=1, setup=None):
+    """Best of `repeat` runs, in seconds; setup runs untimed before each one."""
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _cold_store():
+    # Drops the mounted shards so load_vault reads from disk again.
+    import logic
+    logic._store = None
+
+
+def bench_size(size, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT):
+    """Runs every operation against a fresh vault of `size` records in the current directory."""
+    import logic
+    repeat = repeat if size < SINGLE_RUN_SIZE else 1
+    ops, rss = {}, {}
+
+    def record(name, seconds):
+        ops[name] = seconds
+        rss[name] = peak_rss_kb()
+
+    start = time.perf_counter()
+    records = synthetic_vault(size, seed)
+    record("generate", time.perf_counter() - start)
+
+    record("save_vault_initial", timed(lambda: logic.save_vault([dict(r) for r in records])))
+    record("load_vault", timed(logic.load_vault, repeat, setup=_cold_store))
+
+    loaded = logic.load_vault()
+    renames = iter(range(1_000_000))
+    def save_one_change():
+        logic.seal_field(loaded[len(loaded) // 2], "app_name", f"Renamed {next(renames)}")
+        logic.save_vault(loaded)
+    record("save_vault_one_change", timed(save_one_change, repeat))
+
+    rows = synthetic_rows(ADD_COUNT, seed + 1)
+    def add_entries():
+        for row in rows:
+            logic.add_password_entry(row["app_name"], row["username"], row["password"], row["vault"])
+    record("add_password_entry", timed(add_entries) / ADD_COUNT)
+
+    record("get_decrypted_vault", timed(logic.get_decrypted_vault, repeat, setup=_cold_store))
+
+    # The vault screen's search runs over its record table, as apply_search_and_sort does.
+    from vault_records import RecordTable
+    table = RecordTable()
+    table.extend(logic.get_decrypted_vault())
+    def search_and_sort():
+        for query in SEARCH_QUERIES:
+            for field, reverse in SORT_FIELDS:
+                table.select(query, None, field, reverse)
+        for field, reverse in SORT_FIELDS:
+            table.select("", VAULTS[0], field, reverse)
+    passes = len(SEARCH_QUERIES) * len(SORT_FIELDS) + len(SORT_FIELDS)
+    record("search_and_sort", timed(search_and_sort, repeat) / passes)
+
+    # Blind-index search over the stored records: only matches are decrypted.
+    def find_entries():
+        for query in SEARCH_QUERIES:
+            logic.find_entries(query)
+    record("find_entries", timed(find_entries, repeat, setup=_cold_store) / len(SEARCH_QUERIES))
+
+    # Domain trie over one saved URL per entry: lookups should not grow with the vault.
+    from vault_domains import DomainIndex
+    rng = random.Random(seed + 3)
+    domains = DomainIndex()
+    for row in synthetic_rows(size, seed):
+        domains.add(row["id"], f"https://{rng.choice(URL_HOSTS)}{row['app_name'].lower()}.{rng.choice(URL_SUFFIXES)}/")
+    lookups = 1_000
+    def domain_lookup():
+        for _ in range(lookups // len(URL_QUERIES)):
+            for url in URL_QUERIES:
+                domains.lookup(url, related=False)
+    record("domain_lookup", timed(domain_lookup, repeat) / lookups)
+
+    plain = [row["password"] for row in synthetic_rows(min(size, CRYPTO_COUNT), seed + 2)]
+    tokens = []
+    encrypt_time = timed(lambda: tokens.extend(logic.encrypt(p) for p in plain))
+    decrypt_time = timed(lambda: [logic.decrypt(t) for t in tokens])
+    rss["crypto"] = peak_rss_kb()
+
+    return {
+        "entries": size,
+        "seconds": ops,
+        "peak_rss_kb_after": rss,
+        "peak_rss_kb": peak_rss_kb(),
+        "encrypt_per_second": len(plain) / encrypt_time,
+        "decrypt_per_second": len(tokens) / decrypt_time,
+    }
+
+
+# ------------------ Runner ------------------
+
+def _run_worker(size, seed, repeat):
+    # The scratch directory gets its own key, vault, tombstones and history.
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="aegisvault-bench-")
+    try:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+        completed = subprocess.run(
+            [sys.executable, os.path.join(here, "vault_bench.py"), "--worker", str(size),
+             "--seed", str(seed), "--repeat", str(repeat)],
+            cwd=workdir, env=env, stdout=subprocess.PIPE, check=True, text=True,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(sizes=BENCH_SIZES, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT):
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "sizes": {},
+    }
+    for size in sizes:
+        print(f"[INFO] {size:,} entries")
+        report["sizes"][str(size)] = _run_worker(size, seed, repeat)
+    return report
+
+
+def compare_with_baseline(report, baseline):
+    regressions = []
+    for size, result in report["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for op, seconds in result["seconds"].items():
+            old = previous["seconds"].get(op)
+            if old and seconds > old * TIME_TOLERANCE and seconds - old > TIME_FLOOR:
+                regressions.append(f"{size} entries: {op} took {seconds:.4f}s, baseline {old:.4f}s")
+        for rate in ("encrypt_per_second", "decrypt_per_second"):
+            old = previous.get(rate)
+            if old and result[rate] * TIME_TOLERANCE < old:
+                regressions.append(f"{size} entries: {rate} dropped to {result[rate]:,.0f} from {old:,.0f}")
+        old_rss, rss = previous.get("peak_rss_kb"), result.get("peak_rss_kb")
+        if old_rss and rss and rss > old_rss * RSS_TOLERANCE:
+            regressions.append(f"{size} entries: peak RSS {rss:,} KB, baseline {old_rss:,} KB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vault storage, crypto and search on synthetic vaults.")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=list(BENCH_SIZES),
+                        help="comma-separated entry counts (default: 1000,10000,100000,1000000)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per operation, best kept")
+    parser.add_argument("--output", default=REPORT_FILE)
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(bench_size(args.worker, args.seed, args.repeat)))
+        return 0
+
+    report = run(args.sizes, args.seed, args.repeat)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    report["regressions"] = compare_with_baseline(report, baseline)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for size, result in report["sizes"].items():
+        timings = ", ".join(f"{op}: {seconds:.4f}s" for op, seconds in result["seconds"].items())
+        print(f"{int(size):,} entries (peak RSS {result['peak_rss_kb'] or 0:,} KB)\n    {timings}\n"
+              f"    encrypt {result['encrypt_per_second']:,.0f}/s, decrypt {result['decrypt_per_second']:,.0f}/s")
+    for regression in report["regressions"]:
+        print(f"[FAIL] {regression}")
+    print(f"[INFO] Report written to {args.output}")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
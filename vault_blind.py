@@ -0,0 +1,76 @@
+import hmac
+import base64
+import hashlib
+
+# ------------------ Blind Index ------------------
+#
+# Encrypted fields can't be searched directly, so each one is stored with
+# a set of blind-index tokens: truncated HMACs of the lower-cased value
+# ("=" + value, for exact matches) and of every NGRAM-character slice of it
+# ("~" + slice, for substring matches). A query is turned into tokens the
+# same way and compared against the stored ones; only records holding all
+# of them need to be decrypted. Each field has its own key, so equal
+# values in different fields don't share tokens.
+#
+# Tokens are truncated to TOKEN_BYTES: an occasional false positive is
+# weeded out after decryption, and short tokens keep records small. A
+# field's tokens are stored as one space-separated string rather than a
+# list, which is far lighter in memory; since every token has the same
+# length and none contains a space, a substring test on that string only
+# ever matches a whole token.
+
+NGRAM = 3
+TOKEN_BYTES = 8
+
+
+def normalize(text):
+    return text.lower().strip()
+
+
+def ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class BlindIndex:
+    def __init__(self, key):
+        self.key = key
+        self._field_keys = {}
+
+    def _field_key(self, field):
+        key = self._field_keys.get(field)
+        if key is None:
+            key = self._field_keys[field] = hmac.new(self.key, field.encode(), hashlib.sha256).digest()
+        return key
+
+    def _token(self, field, text):
+        digest = hmac.new(self._field_key(field), text.encode(), hashlib.sha256).digest()[:TOKEN_BYTES]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def tokens(self, field, value):
+        """Stored tokens for one field value; sorted so they don't reveal the order of the slices."""
+        value = normalize(value)
+        tokens = {self._token(field, "=" + value)}
+        tokens.update(self._token(field, "~" + gram) for gram in ngrams(value))
+        return " ".join(sorted(tokens))
+
+    def exact_tokens(self, field, values):
+        """Stored tokens for a field holding several values that are only ever matched whole."""
+        return " ".join(sorted({self._token(field, "=" + normalize(value)) for value in values}))
+
+    def exact_query(self, field, text):
+        return [self._token(field, "=" + normalize(text))]
+
+    def substring_query(self, field, text):
+        """Tokens every value containing text must hold, or None when text is shorter than NGRAM."""
+        text = normalize(text)
+        if len(text) < NGRAM:
+            return [] if not text else None
+        return [self._token(field, "~" + gram) for gram in ngrams(text)]
+
+
+def may_match(blind, field, query):
+    """True when the stored tokens of a field hold every query token; None queries can't rule anything out."""
+    if query is None:
+        return True
+    stored = blind.get(field, "")
+    return all(token in stored for token in query)
@@ -0,0 +1,267 @@
+import os
+import json
+import queue
+import socket
+import struct
+import tempfile
+import threading
+import socketserver
+
+import logic
+
+# ------------------ Socket Path ------------------
+
+DAEMON_SOCKET = os.environ.get(
+    "AEGISVAULT_SOCKET",
+    os.path.join(os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir()), f"aegisvault-{os.getuid()}.sock")
+)
+
+# ------------------ Framing ------------------
+#
+# Every message is a 4 byte big-endian length followed by compact JSON.
+# Requests are {"op": ..., **args}; replies are {"ok": true, "result": ...}
+# or {"ok": false, "error": "..."}.
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Connection closed.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock, message):
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def recv_frame(sock):
+    (size,) = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    if size > MAX_FRAME:
+        raise ConnectionError("Frame too large.")
+    return json.loads(_recv_exact(sock, size))
+
+
+# ------------------ In-memory Vault ------------------
+
+class VaultIndex:
+    """The decrypted vault plus lookup tables, reloaded only when the file changes."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stats = None
+        self._shards = {}       # vault -> decrypted entries
+        self.entries = []
+        self._by_app = {}       # lower-cased app name -> list of entries
+        self._haystacks = []    # lower-cased "app username vault" per entry
+
+    def _refresh(self):
+        # Only shards whose files changed since the last request are decrypted again.
+        stats = logic.get_store().shard_stats()
+        if stats == self._stats:
+            return
+        previous = self._stats or {}
+        for vault, stat in stats.items():
+            if previous.get(vault) != stat or vault not in self._shards:
+                entries = logic.decrypt_entries(logic.load_vault(vault))
+                for entry in entries:
+                    entry["id"] = logic.entry_id(entry)
+                self._shards[vault] = entries
+        for vault in set(self._shards) - set(stats):
+            del self._shards[vault]
+        self._stats = stats
+        self.entries = [entry for entries in self._shards.values() for entry in entries]
+        self._reindex()
+
+    def _reindex(self):
+        self._by_app = {}
+        for entry in self.entries:
+            self._by_app.setdefault(entry["app_name"].lower(), []).append(entry)
+        self._haystacks = [
+            f"{e['app_name']}\0{e['username']}\0{e['vault']}".lower() for e in self.entries
+        ]
+
+    def get(self, app_name):
+        with self._lock:
+            self._refresh()
+            return list(self._by_app.get(app_name.lower(), []))
+
+    def search(self, text):
+        text = text.lower()
+        with self._lock:
+            self._refresh()
+            return [e for e, hay in zip(self.entries, self._haystacks) if text in hay]
+
+    def list(self, vault=None):
+        with self._lock:
+            self._refresh()
+            return [e for e in self.entries if vault is None or e["vault"] == vault]
+
+    def add(self, app_name, username, password, vault="Personal"):
+        with self._lock:
+            logic.add_password_entry(app_name, username, password, vault)
+            self._refresh()
+
+    def delete(self, entry_id):
+        with self._lock:
+            if not logic.delete_entry(entry_id):
+                return False
+            self._refresh()
+            return True
+
+
+# ------------------ Server ------------------
+#
+# Only get returns passwords; search and ls send the listing fields, so a
+# listing over the socket never carries the vault's secrets.
+
+LISTING_FIELDS = ("id", "app_name", "username", "vault", "date_added", "updated_at")
+
+
+def listing(entries):
+    return [{field: entry[field] for field in LISTING_FIELDS if field in entry} for entry in entries]
+
+
+def _socket_in_use(path):
+    # A socket file can outlive its daemon; only a live one accepts connections.
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1.0)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        index = self.server.index
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (ConnectionError, ValueError):
+                return
+            try:
+                send_frame(self.request, {"ok": True, "result": self.dispatch(index, request)})
+            except Exception as e:
+                send_frame(self.request, {"ok": False, "error": str(e)})
+
+    def dispatch(self, index, request):
+        op = request.get("op")
+        if op == "get":
+            return index.get(request["app_name"])
+        if op == "search":
+            return listing(index.search(request["text"]))
+        if op == "ls":
+            return listing(index.list(request.get("vault")))
+        if op == "add":
+            index.add(request["app_name"], request["username"], request["password"],
+                      request.get("vault", "Personal"))
+            return True
+        if op == "delete":
+            return index.delete(request["id"])
+        if op == "ping":
+            return "pong"
+        raise ValueError(f"Unknown op: {op}")
+
+
+class VaultDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=DAEMON_SOCKET):
+        if os.path.exists(path):
+            if _socket_in_use(path):
+                raise RuntimeError(f"Another AegisVault daemon is already listening on {path}.")
+            os.unlink(path)
+        self.index = VaultIndex()
+        old_umask = os.umask(0o177)   # socket is owner-only
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+# ------------------ Client ------------------
+
+class VaultClient:
+    """Talks to the daemon over pooled, persistent connections."""
+
+    def __init__(self, path=DAEMON_SOCKET, pool_size=4):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def request(self, op, **args):
+        try:
+            sock = self._pool.get_nowait()
+        except queue.Empty:
+            sock = self._connect()
+        try:
+            send_frame(sock, {"op": op, **args})
+            reply = recv_frame(sock)
+        except Exception:
+            sock.close()
+            raise
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def get(self, app_name):
+        return self.request("get", app_name=app_name)
+
+    def search(self, text):
+        return self.request("search", text=text)
+
+    def ls(self, vault=None):
+        return self.request("ls", vault=vault)
+
+    def add(self, app_name, username, password, vault="Personal"):
+        return self.request("add", app_name=app_name, username=username, password=password, vault=vault)
+
+    def delete(self, entry_id):
+        return self.request("delete", id=entry_id)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+if __name__ == "__main__":
+    import sys
+    try:
+        server = VaultDaemon()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"[INFO] AegisVault daemon listening on {DAEMON_SOCKET}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
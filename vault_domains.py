@@ -0,0 +1,260 @@
+import os
+import ipaddress
+from urllib.parse import urlsplit
+
+# ------------------ Public Suffixes ------------------
+#
+# A site is its registrable domain: the public suffix ("com", "co.uk",
+# "github.io") plus one label. Suffix rules follow the Public Suffix List
+# format: "*" matches any one label, "!" marks an exception to a wildcard,
+# and a host no rule covers has a one-label suffix. The rules are kept in a
+# trie over reversed labels, so finding a host's suffix costs one step per
+# label. Only a compact set of common rules is built in; drop the full
+# list from publicsuffix.org next to the vault as PUBLIC_SUFFIX_FILE to use
+# it instead.
+
+PUBLIC_SUFFIX_FILE = "public_suffix_list.dat"
+
+BUILTIN_RULES = (
+    # Second-level country domains
+    "ac.uk", "co.uk", "gov.uk", "ltd.uk", "me.uk", "net.uk", "nhs.uk", "org.uk", "plc.uk", "sch.uk",
+    "com.au", "edu.au", "gov.au", "id.au", "net.au", "org.au",
+    "co.nz", "govt.nz", "net.nz", "org.nz",
+    "ac.jp", "co.jp", "go.jp", "ne.jp", "or.jp",
+    "co.kr", "go.kr", "or.kr",
+    "com.br", "gov.br", "net.br", "org.br",
+    "com.cn", "edu.cn", "gov.cn", "net.cn", "org.cn",
+    "com.hk", "com.sg", "com.tw", "com.my", "com.ph", "com.vn", "co.id", "co.th", "in.th",
+    "co.in", "firm.in", "gen.in", "net.in", "org.in",
+    "com.mx", "com.ar", "com.co", "com.pe", "com.tr", "com.ua", "com.pl", "co.il", "org.il",
+    "co.za", "org.za", "com.ng", "com.eg", "com.sa", "com.pk",
+    "*.ck", "!www.ck", "*.bd", "*.np",
+    # Hosting providers that give every customer a subdomain
+    "github.io", "gitlab.io", "pages.dev", "workers.dev", "netlify.app", "vercel.app", "web.app",
+    "firebaseapp.com", "herokuapp.com", "appspot.com", "blogspot.com", "cloudfront.net",
+    "azurewebsites.net", "s3.amazonaws.com", "onrender.com", "fly.dev", "glitch.me", "duckdns.org",
+)
+
+_RULE = None     # key of the rule marker in a trie node; labels are never None
+
+
+def _ascii_label(label):
+    try:
+        return label.encode("idna").decode() if not label.isascii() else label
+    except UnicodeError:
+        return label
+
+
+class PublicSuffixList:
+    def __init__(self, rules=BUILTIN_RULES):
+        self._root = {}
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add_rule(self, rule):
+        exception = rule.startswith("!")
+        node = self._root
+        for label in reversed(rule.lstrip("!").lower().split(".")):
+            node = node.setdefault(_ascii_label(label), {})
+        node[_RULE] = "!" if exception else "+"
+
+    @classmethod
+    def load(cls, path):
+        """Reads a list in publicsuffix.org format."""
+        rules = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("//"):
+                    rules.append(line.split()[0])
+        return cls(rules)
+
+    def suffix_length(self, labels):
+        """Number of labels in the public suffix of a host given as reversed labels."""
+        longest = 1
+        nodes = [self._root]
+        for depth, label in enumerate(labels, 1):
+            following = []
+            for node in nodes:
+                for key in (label, "*"):
+                    child = node.get(key)
+                    if child is None:
+                        continue
+                    rule = child.get(_RULE)
+                    if rule == "!":
+                        # An exception wins outright; its suffix drops the rule's leftmost label.
+                        return depth - 1
+                    if rule:
+                        longest = max(longest, depth)
+                    following.append(child)
+            if not following:
+                break
+            nodes = following
+        return longest
+
+
+_default_suffixes = None
+
+
+def default_suffixes():
+    global _default_suffixes
+    if _default_suffixes is None:
+        if os.path.exists(PUBLIC_SUFFIX_FILE):
+            _default_suffixes = PublicSuffixList.load(PUBLIC_SUFFIX_FILE)
+        else:
+            _default_suffixes = PublicSuffixList()
+    return _default_suffixes
+
+
+# ------------------ URLs ------------------
+
+def parse_url(url):
+    """(host, path) of a URL; the scheme is optional. Raises ValueError when there is no host."""
+    url = url.strip()
+    parts = urlsplit(url if "://" in url else "//" + url)
+    host = (parts.hostname or "").rstrip(".")
+    if not host or any(c.isspace() for c in host):
+        raise ValueError(f"No host name in {url!r}")
+    host = ".".join(_ascii_label(label) for label in host.split("."))
+    return host, parts.path or "/"
+
+
+def host_labels(host):
+    """Reversed labels of a host; an IP address is one label, as it has no parent domains."""
+    try:
+        ipaddress.ip_address(host)
+        return [host]
+    except ValueError:
+        return host.split(".")[::-1]
+
+
+def site_length(labels, suffixes=None):
+    """Labels of the registrable domain, or None when the host is itself a public suffix.
+
+    Single-label hosts (an IP address, "localhost", an intranet name) are
+    their own site.
+    """
+    if len(labels) == 1:
+        return 1
+    suffix = (suffixes or default_suffixes()).suffix_length(labels)
+    return suffix + 1 if len(labels) > suffix else None
+
+
+def site_of(url, suffixes=None):
+    """The registrable domain of a URL ("google.com" for accounts.google.com), or None."""
+    labels = host_labels(parse_url(url)[0])
+    length = site_length(labels, suffixes)
+    return None if length is None else ".".join(reversed(labels[:length]))
+
+
+def _path_match(saved, path):
+    # Length of the saved path when the visited path is under it, -1 otherwise.
+    saved = saved.rstrip("/")
+    if not saved or path == saved or path.startswith(saved + "/"):
+        return len(saved)
+    return -1
+
+
+# ------------------ Domain Index ------------------
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = {}       # entry id -> saved path
+
+
+class DomainIndex:
+    """Entry IDs by saved URL, in a trie over reversed host labels.
+
+    A lookup walks down the visited host one label at a time, so it costs
+    O(labels in the host) whatever the number of entries. Entries saved for
+    the host itself rank first, then those saved for each parent domain
+    down to the site ("google.com" matches mail.google.com, "com" never
+    does); with related=True, entries saved for other hosts of the same
+    site ("accounts.google.com" when visiting mail.google.com) come last.
+    Within a rank, a longer saved path the visited path falls under wins.
+    """
+
+    def __init__(self, suffixes=None):
+        self.suffixes = suffixes
+        self._root = _Node()
+        self._hosts = {}        # entry id -> reversed labels of each saved host
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def add(self, target_id, url):
+        host, path = parse_url(url)
+        labels = host_labels(host)
+        node = self._root
+        for label in labels:
+            node = node.children.setdefault(label, _Node())
+        node.entries.setdefault(target_id, path)
+        self._hosts.setdefault(target_id, []).append(labels)
+
+    def add_entry(self, entry):
+        """Indexes every URL of a decrypted entry; URLs without a host are skipped."""
+        for url in entry.get("urls") or ():
+            try:
+                self.add(entry["id"], url)
+            except ValueError:
+                pass
+
+    def remove(self, target_id):
+        for labels in self._hosts.pop(target_id, ()):
+            trail = [self._root]
+            for label in labels:
+                node = trail[-1].children.get(label)
+                if node is None:
+                    break
+                trail.append(node)
+            else:
+                trail[-1].entries.pop(target_id, None)
+                # Drop the nodes left with nothing under them.
+                for depth in range(len(labels), 0, -1):
+                    node = trail[depth]
+                    if node.entries or node.children:
+                        break
+                    del trail[depth - 1].children[labels[depth - 1]]
+
+    def clear(self):
+        self.__init__(self.suffixes)
+
+    def lookup(self, url, related=True):
+        """Entry IDs for a visited URL, best match first; empty when the host is a public suffix."""
+        host, path = parse_url(url)
+        labels = host_labels(host)
+        site = site_length(labels, self.suffixes)
+        if site is None:
+            return []
+
+        ranks = {}
+        def consider(entries, depth):
+            for target_id, saved in entries.items():
+                rank = (depth, _path_match(saved, path))
+                if rank > ranks.get(target_id, (-1, -1)):
+                    ranks[target_id] = rank
+
+        node, site_node, path_nodes = self._root, None, set()
+        for depth, label in enumerate(labels, 1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if depth == site:
+                site_node = node
+            if depth >= site:
+                consider(node.entries, depth)
+                path_nodes.add(id(node))
+
+        if related and site_node is not None:
+            # Other hosts of the same site: the subtree under the site, off the visited path.
+            stack = list(site_node.children.values())
+            while stack:
+                node = stack.pop()
+                if id(node) not in path_nodes:
+                    consider(node.entries, 0)
+                stack.extend(node.children.values())
+
+        return sorted(ranks, key=lambda target_id: ranks[target_id], reverse=True)
@@ -0,0 +1,253 @@
+import os
+import json
+from datetime import datetime
+from vault_trace import traced
+
+# ------------------ File Paths ------------------
+
+HISTORY_FILE = "vault_history.jsonl"
+
+# ------------------ Retention ------------------
+#
+# The history is an append-only log of JSON lines. A full snapshot of the
+# stored (encrypted) records is written after the first change and then
+# every SNAPSHOT_INTERVAL changes; between snapshots each save only appends
+# the records it touched, as [id, before, after] triples. Keeping both sides
+# makes every delta reversible, which is what undo and redo replay.
+# Once more than KEEP_SNAPSHOTS snapshots exist, everything before the
+# oldest kept one is dropped.
+
+SNAPSHOT_INTERVAL = 50
+KEEP_SNAPSHOTS = 8
+
+# Changes the app makes on its own (sealing metadata after unlock) are
+# logged so point-in-time restore stays exact, but are not undo steps: the
+# user's next undo should revert their own last edit, not the upkeep.
+MAINTENANCE_KINDS = ("seal",)
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _as_time(when):
+    return when.isoformat() if isinstance(when, datetime) else str(when)
+
+
+def diff_records(before, after, id_of):
+    """Returns [id, old, new] for every record that differs between two stored states."""
+    old = {id_of(entry): entry for entry in before}
+    new = {id_of(entry): entry for entry in after}
+    changes = [[i, old[i], new.get(i)] for i in old if old[i] != new.get(i)]
+    changes += [[i, None, new[i]] for i in new if i not in old]
+    return changes
+
+
+def apply_changes(records, changes, id_of, reverse=False):
+    """Applies delta triples to a list of records, keeping the order of untouched ones."""
+    position = {id_of(entry): index for index, entry in enumerate(records)}
+    result = list(records)
+    dropped = set()
+    for target_id, before, after in changes:
+        if reverse:
+            before, after = after, before
+        index = position.get(target_id)
+        if after is None:
+            if index is not None:
+                dropped.add(index)
+        elif index is None:
+            position[target_id] = len(result)
+            result.append(after)
+        else:
+            dropped.discard(index)
+            result[index] = after
+    return [entry for index, entry in enumerate(result) if index not in dropped]
+
+
+# ------------------ History Store ------------------
+
+class VaultHistory:
+    """Snapshot-plus-delta history of the vault with undo, redo and point-in-time restore."""
+
+    def __init__(self, path=HISTORY_FILE, id_of=None):
+        self.path = path
+        if id_of is None:
+            from logic import entry_id as id_of
+        self.id_of = id_of
+        self._stat = None
+        self._next_seq = 0
+        self._since_snapshot = 0
+        self._snapshots = 0
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _sync(self):
+        # Counters are rebuilt only when another writer touched the log.
+        stat = self._file_stat()
+        if stat == self._stat:
+            return
+        self._next_seq = self._since_snapshot = self._snapshots = 0
+        for record in self.records():
+            self._next_seq = record["seq"] + 1
+            if record["kind"] == "snapshot":
+                self._snapshots += 1
+                self._since_snapshot = 0
+            else:
+                self._since_snapshot += 1
+        self._stat = stat
+
+    def _append(self, record):
+        record["seq"] = self._next_seq
+        record["time"] = record.get("time") or _now()
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._next_seq += 1
+        if record["kind"] == "snapshot":
+            self._snapshots += 1
+            self._since_snapshot = 0
+        else:
+            self._since_snapshot += 1
+        self._stat = self._file_stat()
+
+    def record(self, before, after, op="edit"):
+        """Appends the difference between two full stored states; returns False if nothing changed."""
+        return self.record_changes(diff_records(before, after, self.id_of), op, lambda: after)
+
+    @traced()
+    def record_changes(self, changes, op="edit", current=None):
+        """Appends [id, before, after] triples.
+
+        current returns the full stored state after the change; it is only
+        called when a snapshot is due, so single-record edits stay cheap.
+        """
+        # Undo and redo are logged even when empty so the stacks stay in step.
+        if not changes and op not in ("undo", "redo"):
+            return False
+        self._sync()
+        self._append({"kind": op, "changes": changes})
+        if self._snapshots == 0 or self._since_snapshot >= SNAPSHOT_INTERVAL:
+            if current is None:
+                import logic
+                current = logic.load_vault
+            self._append({"kind": "snapshot", "records": current()})
+            if self._snapshots > KEEP_SNAPSHOTS:
+                self.compact()
+        return True
+
+    def compact(self, keep=None):
+        """Drops every record older than the keep-th most recent snapshot."""
+        keep = keep or KEEP_SNAPSHOTS
+        snapshot_seqs = [r["seq"] for r in self.records() if r["kind"] == "snapshot"]
+        if len(snapshot_seqs) <= keep:
+            return
+        first_kept = snapshot_seqs[-keep]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as out:
+            for record in self.records():
+                if record["seq"] >= first_kept:
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        self._stat = None
+
+    # ------------------ Undo / Redo ------------------
+
+    def _stacks(self):
+        # Replays only the bookkeeping: edits push onto undo, undo moves the
+        # top to redo, redo moves it back, and a fresh edit clears redo.
+        undo, redo = [], []
+        for record in self.records():
+            kind = record["kind"]
+            if kind == "snapshot" or kind in MAINTENANCE_KINDS:
+                continue
+            if kind == "undo":
+                if undo:
+                    redo.append(undo.pop())
+            elif kind == "redo":
+                if redo:
+                    undo.append(redo.pop())
+            else:
+                undo.append(record)
+                redo.clear()
+        return undo, redo
+
+    def can_undo(self):
+        return bool(self._stacks()[0])
+
+    def can_redo(self):
+        return bool(self._stacks()[1])
+
+    @traced()
+    def _step(self, kind):
+        import logic
+        undo, redo = self._stacks()
+        stack = undo if kind == "undo" else redo
+        if not stack:
+            return False
+        changes = stack[-1]["changes"]
+        current = logic.load_vault()
+        target = apply_changes(current, changes, self.id_of, reverse=(kind == "undo"))
+        logic.save_vault(target, history_op=kind)
+        return True
+
+    def undo(self):
+        return self._step("undo")
+
+    def redo(self):
+        return self._step("redo")
+
+    # ------------------ Point-in-time ------------------
+
+    @traced()
+    def state_at(self, when):
+        """Stored records as they were at `when` (datetime or ISO string), or None if older than the history."""
+        when = _as_time(when)
+        state, pending = None, []
+        for record in self.records():
+            if record["time"] > when:
+                break
+            if record["kind"] == "snapshot":
+                state, pending = record["records"], []
+            elif state is not None:
+                pending.append(record["changes"])
+        # Only the deltas after the closest snapshot are replayed.
+        for changes in pending:
+            state = apply_changes(state, changes, self.id_of)
+        return state
+
+    def restore(self, when):
+        """Rewrites the vault as it was at `when`; the restore itself can be undone."""
+        import logic
+        state = self.state_at(when)
+        if state is None:
+            return False
+        logic.save_vault(state, history_op="restore")
+        return True
+
+    def log(self):
+        """(seq, time, kind, records touched) for each change, oldest first."""
+        return [
+            (r["seq"], r["time"], r["kind"], len(r["changes"]))
+            for r in self.records() if r["kind"] != "snapshot"
+        ]
+
+
+_default_history = None
+
+def default_history():
+    global _default_history
+    if _default_history is None:
+        _default_history = VaultHistory()
+    return _default_history
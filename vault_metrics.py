@@ -0,0 +1,240 @@
+import os
+import time
+import atexit
+import threading
+import functools
+
+# ------------------ Settings ------------------
+#
+# Counters and latency histograms are always on. main.py starts an exporter
+# that rewrites METRICS_FILE in Prometheus text format every
+# EXPORT_INTERVAL_SECONDS and once more at exit, so a node_exporter
+# textfile collector (or a plain tail) can pick them up. AEGISVAULT_METRICS
+# overrides the path; "0" turns the file off.
+
+METRICS_ENV = "AEGISVAULT_METRICS"
+METRICS_FILE = "aegisvault_metrics.prom"
+EXPORT_INTERVAL_SECONDS = 60
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# ------------------ Histogram Layout ------------------
+#
+# HDR-style log-linear buckets over integer microseconds: values below
+# 2 * SUB_BUCKETS get a bucket each, and every power of two above that is
+# split into SUB_BUCKETS equal slices. Any value is off by under 1/64
+# (about 1.6%), from one microsecond up to hours, using a few hundred
+# buckets at most.
+
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def _bucket_index(value):
+    magnitude = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+    return magnitude * SUB_BUCKETS + (value >> magnitude)
+
+
+def _bucket_upper(index):
+    magnitude = max(index // SUB_BUCKETS - 1, 0)
+    return ((index - magnitude * SUB_BUCKETS + 1) << magnitude) - 1
+
+
+# ------------------ Metrics ------------------
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self):
+        return [f"{self.name} {self.value}"]
+
+
+class Histogram:
+    """Latency histogram; values are recorded in seconds and kept as microseconds."""
+
+    kind = "summary"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds):
+        self.record_many((seconds,))
+
+    def record_many(self, durations):
+        """Adds one observation per duration, taking the lock once for the lot."""
+        values = [max(int(seconds * 1_000_000), 0) for seconds in durations]
+        if not values:
+            return
+        indexes = [_bucket_index(value) for value in values]
+        with self._lock:
+            for index in indexes:
+                self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += len(values)
+            self.total += sum(values)
+            self.max = max(self.max, *values)
+
+    def time(self):
+        return _Timer(self)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, in seconds."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(q * self.count, 1)
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= rank:
+                    return min(_bucket_upper(index), self.max) / 1_000_000
+            return self.max / 1_000_000
+
+    def render(self):
+        lines = [f'{self.name}{{quantile="{q}"}} {self.percentile(q):.6f}' for q in QUANTILES]
+        with self._lock:
+            lines.append(f"{self.name}_sum {self.total / 1_000_000:.6f}")
+            lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+        return False
+
+
+# ------------------ Registry ------------------
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text=""):
+        return self._get(Histogram, name, help_text)
+
+    def metrics(self):
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, help_text=""):
+    return REGISTRY.counter(name, help_text)
+
+
+def histogram(name, help_text=""):
+    return REGISTRY.histogram(name, help_text)
+
+
+def timed(name, help_text=""):
+    """Decorator recording each call's duration in the named histogram."""
+    target = histogram(name, help_text)
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                target.record(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# ------------------ Export ------------------
+
+def metrics_path():
+    path = os.environ.get(METRICS_ENV, "").strip() or METRICS_FILE
+    return None if path == "0" else path
+
+
+class MetricsExporter:
+    """Rewrites the metrics file on a daemon thread until stop()."""
+
+    def __init__(self, path=None, interval=EXPORT_INTERVAL_SECONDS, registry=REGISTRY):
+        self.path = path or metrics_path()
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.path is None or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            self.registry.write(self.path)
+        except OSError as e:
+            print(f"[WARN] Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.export()
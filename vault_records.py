@@ -0,0 +1,236 @@
+from array import array
+from collections.abc import MutableMapping
+
+# ------------------ Compact Records ------------------
+#
+# The vault screen holds every decrypted entry for as long as it is open.
+# As plain dicts each one carries its own hash table; a slotted Record
+# keeps the known fields in fixed attribute slots instead, and the strings
+# that repeat across entries (vault, application, username) are shared
+# through the owning table. Filtered views are arrays of table slots
+# rather than lists of references. Fields the screen never reads once an
+# entry is tracked (the edit time, and the fingerprint, which the reuse
+# index keeps in compact form) are left out of the table's records.
+#
+# Search and sort run on every keystroke, so the table also keeps one
+# column per searched or sorted field, holding each slot's lower-cased
+# value. select() then filters and sorts over plain lists of strings
+# without calling into the records. Dates and most usernames need no
+# lower-casing and share the record's string; repeated names and vaults
+# share one lower-cased copy. Records are never edited in place
+# once added: the screen removes and re-adds them, which keeps the
+# columns current.
+
+FIELDS = ("id", "app_name", "username", "password", "vault", "date_added", "totp", "urls")
+SHARED_FIELDS = ("app_name", "username", "vault")
+DROPPED_FIELDS = frozenset(("updated_at", "fingerprint"))
+_FIELD_SET = frozenset(FIELDS)
+# Fields with a lower-cased column: what search matches and the screen sorts by.
+SEARCH_FIELDS = ("app_name", "username", "vault")
+KEY_FIELDS = SEARCH_FIELDS + ("date_added",)
+
+
+class Record(MutableMapping):
+    """An entry with the dict interface, stored in slots; unknown keys go to a side dict."""
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, values=(), strings=None):
+        self.extra = None
+        for key, value in dict(values).items():
+            if strings is not None and key in SHARED_FIELDS and isinstance(value, str):
+                value = strings.setdefault(value, value)
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __iter__(self):
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # The Mapping mixins go through __getitem__ and exceptions; search and
+    # sort call these for every entry, so they get direct versions.
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+class RecordTable:
+    """Records of the vault screen by slot, with an index from ID to slot.
+
+    Removed slots are reused by later adds, so a view must drop a record's
+    row when it is removed, as the vault screen does. An ID can be added
+    only once; remove the old record first to replace it, so no view is
+    left holding its slot twice.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.slot_of = {}
+        self._free = []
+        self._strings = {}
+        self._vaults = []                                   # slot -> vault name, None when free
+        self._keys = {field: [] for field in KEY_FIELDS}   # field -> slot -> lower-cased value
+
+    def _lower(self, field, value):
+        if not isinstance(value, str):
+            return ""
+        if field == "date_added":
+            # Lower-casing an ISO date's "T" never changes its order, so the record's string does.
+            return value
+        lowered = value.lower()
+        if lowered == value:
+            return value
+        if field in SHARED_FIELDS:
+            return self._strings.setdefault(lowered, lowered)
+        return lowered
+
+    def add(self, entry):
+        if entry["id"] in self.slot_of:
+            raise ValueError(f"Record {entry['id']} is already in the table.")
+        if isinstance(entry, Record):
+            record = entry
+        else:
+            record = Record(((key, value) for key, value in entry.items() if key not in DROPPED_FIELDS),
+                            self._strings)
+        if self._free:
+            slot = self._free.pop()
+            self.records[slot] = record
+            self._vaults[slot] = record.get("vault", "")
+            for field, column in self._keys.items():
+                column[slot] = self._lower(field, record.get(field, ""))
+        else:
+            slot = len(self.records)
+            self.records.append(record)
+            self._vaults.append(record.get("vault", ""))
+            for field, column in self._keys.items():
+                column.append(self._lower(field, record.get(field, "")))
+        self.slot_of[record["id"]] = slot
+        return record
+
+    def extend(self, entries):
+        """Adds entries; returns them as the stored Records, in order."""
+        return [self.add(entry) for entry in entries]
+
+    def get(self, target_id):
+        slot = self.slot_of.get(target_id)
+        return None if slot is None else self.records[slot]
+
+    def remove(self, target_id):
+        slot = self.slot_of.pop(target_id, None)
+        if slot is None:
+            return None
+        record, self.records[slot] = self.records[slot], None
+        # A free slot has no vault and matches no search text.
+        self._vaults[slot] = None
+        for column in self._keys.values():
+            column[slot] = ""
+        self._free.append(slot)
+        return record
+
+    def clear(self):
+        self.__init__()
+
+    def __iter__(self):
+        return (record for record in self.records if record is not None)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def select(self, search_text="", vault=None, sort_field="app_name", reverse=False):
+        """A view of the records matching the search text (and vault, if given), sorted
+        case-insensitively on one field, as logic.matches_search and logic.sort_key would."""
+        search_text = search_text.lower().strip()
+        vaults = self._vaults
+        if search_text:
+            apps, users, vault_keys = (self._keys[field] for field in SEARCH_FIELDS)
+            slots = [slot for slot, (app, user, vault_key) in enumerate(zip(apps, users, vault_keys))
+                     if search_text in app or search_text in user or search_text in vault_key]
+            if vault is not None:
+                slots = [slot for slot in slots if vaults[slot] == vault]
+        elif vault is not None:
+            slots = [slot for slot, name in enumerate(vaults) if name == vault]
+        else:
+            slots = [slot for slot, name in enumerate(vaults) if name is not None]
+        if sort_field in self._keys:
+            slots.sort(key=self._keys[sort_field].__getitem__, reverse=reverse)
+        else:
+            records = self.records
+            slots.sort(key=lambda slot: str(records[slot].get(sort_field, "")).lower(), reverse=reverse)
+        return RecordView(self, slots)
+
+
+class RecordView:
+    """Rows of a table in display order, held as an array of slots; supports the list calls the screen uses."""
+
+    def __init__(self, table, slots=()):
+        self.table = table
+        self.slots = array("q", slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, row):
+        return self.table.records[self.slots[row]]
+
+    def __delitem__(self, row):
+        del self.slots[row]
+
+    def __iter__(self):
+        records = self.table.records
+        return (records[slot] for slot in self.slots)
+
+    def insert(self, row, record):
+        self.slots.insert(row, self.table.slot_of[record["id"]])
+
+    def append(self, record):
+        self.slots.append(self.table.slot_of[record["id"]])
+
+    def extend(self, records):
+        slot_of = self.table.slot_of
+        self.slots.extend(slot_of[record["id"]] for record in records)
@@ -0,0 +1,469 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from vault_trace import traced
+
+# ------------------ On-disk Layout ------------------
+#
+# One JSON list per vault ("shard") in a directory, plus manifest.json
+# mapping each vault name to its shard file and its record count as of the
+# last full write. A shard is parsed ("mounted") the first time one of its
+# records is asked for and re-parsed only when its files change.
+#
+# Single-record edits don't rewrite the shard: they append one line to a
+# <shard>.journal file ({"put": record} or {"delete": id}) that is replayed
+# on mount. Once the journal outgrows the shard it is folded back in by a
+# full write. Bulk saves rewrite only the shards whose records changed.
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_VAULT = "Personal"
+STREAM_CHUNK = 64 * 1024     # characters read per step when streaming a shard
+JOURNAL_COMPACT_MIN = 256    # journal lines always tolerated before folding
+
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, TypeError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _shard_file_name(vault, taken):
+    base = re.sub(r"[^a-z0-9]+", "_", vault.lower()).strip("_") or "vault"
+    name, n = f"{base}.json", 2
+    while name in taken:
+        name, n = f"{base}_{n}.json", n + 1
+    return name
+
+
+# ------------------ Record IDs ------------------
+#
+# IDs are ULIDs: 48 bits of millisecond time then 80 random bits, written
+# as 26 Crockford base32 characters, so they sort by creation time.
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def _ulid(ms, randomness):
+    value = (ms << 80) | randomness
+    return "".join(_CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def new_record_id():
+    return _ulid(int(time.time() * 1000), int.from_bytes(os.urandom(10), "big"))
+
+
+def legacy_record_id(entry, occurrence=0):
+    """Deterministic ID for a record saved before IDs existed.
+
+    Derived from the record itself, so two copies of an old vault that are
+    migrated separately still agree and can be synced.
+    """
+    try:
+        ms = int(datetime.fromisoformat(entry.get("date_added", "")).timestamp() * 1000)
+    except ValueError:
+        ms = 0
+    key = f"{entry['username']}\0{entry['app_name']}\0{entry.get('date_added', '')}\0{occurrence}"
+    return _ulid(max(ms, 0), int.from_bytes(hashlib.sha256(key.encode()).digest()[:10], "big"))
+
+
+def _assign_id(entry, seen):
+    # seen counts ID-less duplicates of one shard, so each copy gets its own occurrence.
+    base = legacy_record_id(entry)
+    occurrence = seen[base] = seen.get(base, -1) + 1
+    entry["id"] = legacy_record_id(entry, occurrence) if occurrence else base
+
+
+def _assign_ids(records):
+    """Gives records without an ID their legacy ID; returns True if any were missing."""
+    missing = [entry for entry in records if not entry.get("id")]
+    seen = {}
+    for entry in missing:
+        _assign_id(entry, seen)
+    return bool(missing)
+
+
+# ------------------ JSON Helpers ------------------
+
+_SKIP_SEPARATORS = re.compile(r"[\s,]*").match
+
+
+def iter_json_array(f, chunk_size=STREAM_CHUNK):
+    """Yields the items of a JSON array one at a time while reading f in chunks.
+
+    Only the unparsed tail of the current chunk is held, never the whole
+    file's text.
+    """
+    raw_decode = json.JSONDecoder().raw_decode
+    buffer, pos, eof, started = "", 0, False, False
+    while True:
+        pos = _SKIP_SEPARATORS(buffer, pos).end()
+        if pos >= len(buffer) - 1 and not eof:
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        if pos >= len(buffer):
+            return
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array.")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = raw_decode(buffer, pos)
+            complete = eof or end < len(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # The item may run past the end of this chunk; read more and retry.
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        yield value
+        pos = end
+
+
+@traced()
+def _read_json_list(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return []
+
+
+@traced()
+def _read_journal(path):
+    if not os.path.exists(path):
+        return []
+    ops = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                break   # torn last line from an interrupted append
+    return ops
+
+
+@traced()
+def _write_json(path, value):
+    # Written beside the target and renamed over it, so readers never see half a file.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(value, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+# ------------------ Mounted Shard ------------------
+
+class _Shard:
+    """Records of one vault with a hash index from ID to list position.
+
+    Deleted positions are left as None holes until the next full write, so
+    put and remove never shift the list.
+    """
+
+    def __init__(self, stat, records):
+        self.stat = stat
+        self.records = records
+        self.index = {entry["id"]: pos for pos, entry in enumerate(records)}
+        self.journal_lines = 0
+
+    def get(self, target_id):
+        pos = self.index.get(target_id)
+        return None if pos is None else self.records[pos]
+
+    def put(self, entry):
+        pos = self.index.get(entry["id"])
+        if pos is None:
+            self.index[entry["id"]] = len(self.records)
+            self.records.append(entry)
+        else:
+            self.records[pos] = entry
+
+    def remove(self, target_id):
+        pos = self.index.pop(target_id, None)
+        if pos is not None:
+            self.records[pos] = None
+
+    def live(self):
+        return [entry for entry in self.records if entry is not None]
+
+    def replay(self, ops):
+        for op in ops:
+            if "put" in op:
+                self.put(op["put"])
+            else:
+                self.remove(op["delete"])
+        self.journal_lines += len(ops)
+
+    def __len__(self):
+        return len(self.index)
+
+
+# ------------------ Store ------------------
+
+class ShardStore:
+    """Vault records stored as one shard file per vault, listed in a manifest."""
+
+    def __init__(self, directory, legacy_file=None):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.legacy_file = legacy_file
+        self._lock = threading.RLock()
+        self._manifest = None
+        self._manifest_stat = None
+        self._mounted = {}      # vault -> _Shard
+        self._where = {}        # record id -> vault, for every mounted shard
+
+    # ------------------ Manifest ------------------
+
+    def manifest(self):
+        with self._lock:
+            stat = _file_stat(self.manifest_path)
+            if self._manifest is None or stat != self._manifest_stat:
+                if stat is None:
+                    self._manifest = {"version": MANIFEST_VERSION, "shards": {}}
+                    if self.legacy_file and os.path.exists(self.legacy_file):
+                        self._migrate_legacy()
+                else:
+                    with open(self.manifest_path, "r") as f:
+                        self._manifest = json.load(f)
+                self._manifest_stat = _file_stat(self.manifest_path)
+            return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(self.manifest_path, self._manifest)
+        self._manifest_stat = _file_stat(self.manifest_path)
+
+    def _migrate_legacy(self):
+        # One-off split of the old single vault.json; the original is kept beside it.
+        self.save(_read_json_list(self.legacy_file))
+        os.replace(self.legacy_file, self.legacy_file + ".migrated")
+
+    def _ensure_shard(self, vault):
+        shards = self.manifest()["shards"]
+        if vault not in shards:
+            taken = {shard["file"] for shard in shards.values()}
+            shards[vault] = {"file": _shard_file_name(vault, taken), "count": 0}
+            self._save_manifest()
+
+    def names(self):
+        return list(self.manifest()["shards"])
+
+    def count(self, vault):
+        shard = self.manifest()["shards"].get(vault)
+        return shard["count"] if shard else 0
+
+    def shard_path(self, vault):
+        shard = self.manifest()["shards"].get(vault)
+        return os.path.join(self.directory, shard["file"]) if shard else None
+
+    def journal_path(self, vault):
+        path = self.shard_path(vault)
+        return path[:-len(".json")] + ".journal" if path else None
+
+    def _shard_stat(self, vault):
+        return (_file_stat(self.shard_path(vault)), _file_stat(self.journal_path(vault)))
+
+    def shard_stats(self):
+        """{vault: stat of its shard and journal files}; cheap enough to poll."""
+        return {vault: self._shard_stat(vault) for vault in self.names()}
+
+    # ------------------ Mounting ------------------
+
+    @traced()
+    def _mount(self, vault):
+        if self.shard_path(vault) is None:
+            return None
+        stat = self._shard_stat(vault)
+        shard = self._mounted.get(vault)
+        if shard is not None and shard.stat == stat:
+            return shard
+
+        records = _read_json_list(self.shard_path(vault))
+        migrated = _assign_ids(records)
+        fresh = _Shard(stat, records)
+        fresh.replay(_read_journal(self.journal_path(vault)))
+        self._index_shard(vault, shard, fresh)
+        if migrated:
+            # Persist the assigned IDs once, so every reader sees the same ones.
+            self._write_shard(vault, fresh.live())
+        return self._mounted[vault]
+
+    def _index_shard(self, vault, old, new):
+        if old is not None:
+            for target_id in old.index.keys() - new.index.keys():
+                if self._where.get(target_id) == vault:
+                    del self._where[target_id]
+        self._mounted[vault] = new
+        for target_id in new.index:
+            self._where[target_id] = vault
+
+    def _locate(self, target_id):
+        vault = self._where.get(target_id)
+        if vault is not None and self._mount(vault).get(target_id) is not None:
+            return vault
+        # Not in a mounted shard: mount the rest, once.
+        for name in self.names():
+            if self._mount(name).get(target_id) is not None:
+                return name
+        return None
+
+    @traced()
+    def _write_shard(self, vault, records):
+        self._ensure_shard(vault)
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(self.shard_path(vault), records)
+        journal = self.journal_path(vault)
+        if os.path.exists(journal):
+            os.remove(journal)
+        shard = _Shard(self._shard_stat(vault), [dict(entry) for entry in records])
+        self._index_shard(vault, self._mounted.get(vault), shard)
+        info = self._manifest["shards"][vault]
+        if info["count"] != len(records):
+            info["count"] = len(records)
+            self._save_manifest()
+
+    @traced()
+    def _append_journal(self, vault, ops):
+        self._ensure_shard(vault)
+        shard = self._mount(vault)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.journal_path(vault), "a") as f:
+            for op in ops:
+                f.write(json.dumps(op, separators=(",", ":")) + "\n")
+        shard.replay(ops)
+        shard.stat = self._shard_stat(vault)
+        for op in ops:
+            if "put" in op:
+                self._where[op["put"]["id"]] = vault
+            elif self._where.get(op["delete"]) == vault:
+                del self._where[op["delete"]]
+        if shard.journal_lines > max(JOURNAL_COMPACT_MIN, len(shard)):
+            self._write_shard(vault, shard.live())
+
+    # ------------------ Records ------------------
+
+    @traced()
+    def load(self, vault=None):
+        """Copies of the stored records of one vault, or of every vault when vault is None."""
+        with self._lock:
+            names = [vault] if vault is not None else self.names()
+            shards = [self._mount(name) for name in names]
+            return [dict(entry) for shard in shards if shard is not None for entry in shard.live()]
+
+    def stream(self, vault=None):
+        """Yields stored records one by one without building the full list first.
+
+        A shard that is already mounted and unchanged is served from memory;
+        otherwise its file is parsed incrementally and not kept.
+        """
+        names = [vault] if vault is not None else self.names()
+        for name in names:
+            path = self.shard_path(name)
+            if path is None:
+                continue
+            shard = self._mounted.get(name)
+            if shard is not None and shard.stat == self._shard_stat(name):
+                for entry in shard.live():
+                    yield dict(entry)
+                continue
+            # Journal edits are applied on the fly: replaced records are
+            # swapped in place, deleted ones skipped, new ones come last.
+            pending = {}
+            for op in _read_journal(self.journal_path(name)):
+                if "put" in op:
+                    pending[op["put"]["id"]] = op["put"]
+                else:
+                    pending[op["delete"]] = None
+            seen = {}
+            try:
+                with open(path, "r") as f:
+                    for entry in iter_json_array(f):
+                        if not entry.get("id"):
+                            # Same numbering as _assign_ids over the whole shard, as load() gets.
+                            _assign_id(entry, seen)
+                        if entry["id"] in pending:
+                            entry = pending.pop(entry["id"])
+                            if entry is None:
+                                continue
+                        yield entry
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                # Same as load(): an unreadable shard reads as empty.
+                pass
+            for entry in pending.values():
+                if entry is not None:
+                    yield entry
+
+    def get(self, target_id):
+        """The stored record with this ID, or None. Mounts other shards only if needed."""
+        with self._lock:
+            vault = self._locate(target_id)
+            return None if vault is None else dict(self._mounted[vault].get(target_id))
+
+    def put(self, entry):
+        """Inserts or replaces one record, moving it if its vault changed. Appends to journals only."""
+        with self._lock:
+            entry = dict(entry)
+            if not entry.get("id"):
+                entry["id"] = new_record_id()
+            vault = entry.get("vault", DEFAULT_VAULT)
+            previous = self._where.get(entry["id"])
+            if previous is not None and previous != vault:
+                self._append_journal(previous, [{"delete": entry["id"]}])
+            self._append_journal(vault, [{"put": entry}])
+            return entry
+
+    def remove(self, target_id):
+        """Deletes one record by ID; returns the removed record or None."""
+        with self._lock:
+            vault = self._locate(target_id)
+            if vault is None:
+                return None
+            removed = self._mounted[vault].get(target_id)
+            self._append_journal(vault, [{"delete": target_id}])
+            return removed
+
+    @traced()
+    def save(self, records, vault=None):
+        """Stores records, rewriting only shards whose contents changed.
+
+        With vault set, records are the complete contents of that one vault
+        and no other shard is read or written.
+        """
+        with self._lock:
+            _assign_ids(records)
+            groups = {}
+            for entry in records:
+                groups.setdefault(entry.get("vault", DEFAULT_VAULT), []).append(entry)
+            if vault is not None:
+                if set(groups) - {vault}:
+                    raise ValueError(f"Records for other vaults passed to a '{vault}' save.")
+                scope = [vault]
+            else:
+                scope = list(dict.fromkeys(self.names() + list(groups)))
+
+            for name in scope:
+                new = groups.get(name, [])
+                shard = self._mount(name)
+                if shard is not None and shard.journal_lines == 0 and new == shard.live():
+                    continue
+                self._write_shard(name, new)
@@ -0,0 +1,224 @@
+import os
+import json
+import shutil
+import hashlib
+import logic
+from vault_store import ShardStore
+from vault_attachments import blob_path
+
+# ------------------ Merkle Layout ------------------
+#
+# Records and tombstones are keyed by id and bucketed by the leading hex
+# digits of sha256(id), giving a fixed 16-way tree whose depth depends only
+# on the record count. Both sides build the same shape, compare hashes top
+# down, and only the leaf buckets whose hashes differ are ever exchanged.
+#
+# The saving is in what crosses between the peers, not in local work:
+# each peer still reads every record to build its tree, as the tree is
+# not kept between syncs. Writing back is proportional to the change:
+# winners go to the shard journals one record at a time.
+
+FANOUT = 16
+BUCKET_SIZE = 16
+EMPTY_HASH = hashlib.sha256(b"").digest()
+HEX_DIGITS = "0123456789abcdef"
+
+
+def tree_depth(count):
+    depth = 1
+    while FANOUT ** depth * BUCKET_SIZE < count:
+        depth += 1
+    return depth
+
+
+def _id_path(target_id):
+    return hashlib.sha256(target_id.encode()).hexdigest()
+
+
+def _item_hash(target_id, item):
+    return hashlib.sha256(json.dumps([target_id, item], sort_keys=True, separators=(",", ":")).encode()).digest()
+
+
+def tombstone(deleted_at):
+    return {"tombstone": True, "deleted_at": deleted_at}
+
+
+def is_tombstone(item):
+    return item.get("tombstone", False)
+
+
+def item_version(item):
+    return item["deleted_at"] if is_tombstone(item) else logic.record_version(item)
+
+
+def newer(a, b):
+    """Last-writer-wins between two versions of one id; ties break deterministically."""
+    if a is None or b is None:
+        return a if b is None else b
+    key_a = (item_version(a), json.dumps(a, sort_keys=True))
+    key_b = (item_version(b), json.dumps(b, sort_keys=True))
+    return a if key_a >= key_b else b
+
+
+class MerkleTree:
+    def __init__(self, items, depth):
+        self.depth = depth
+        self.buckets = {}
+        for target_id, item in items.items():
+            self.buckets.setdefault(_id_path(target_id)[:depth], {})[target_id] = item
+
+        self.levels = [{} for _ in range(depth + 1)]
+        leaves = self.levels[depth]
+        for prefix, bucket in self.buckets.items():
+            h = hashlib.sha256()
+            for target_id in sorted(bucket):
+                h.update(_item_hash(target_id, bucket[target_id]))
+            leaves[prefix] = h.digest()
+        for level in range(depth - 1, -1, -1):
+            children = self.levels[level + 1]
+            parents = self.levels[level]
+            for prefix in {child[:-1] for child in children}:
+                parents[prefix] = hashlib.sha256(
+                    b"".join(children.get(prefix + digit, EMPTY_HASH) for digit in HEX_DIGITS)
+                ).digest()
+
+    def node(self, prefix):
+        return self.levels[len(prefix)].get(prefix, EMPTY_HASH)
+
+    def children(self, prefixes):
+        level = self.levels[len(prefixes[0]) + 1] if prefixes else {}
+        return {
+            prefix + digit: level[prefix + digit]
+            for prefix in prefixes for digit in HEX_DIGITS if prefix + digit in level
+        }
+
+
+# ------------------ Peers ------------------
+
+class DirectoryPeer:
+    """One vault copy in a directory. A remote copy would answer the same calls over the wire."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.store = ShardStore(os.path.join(self.directory, logic.VAULT_DIR),
+                                legacy_file=os.path.join(self.directory, logic.VAULT_FILE))
+        self.tombstone_path = os.path.join(self.directory, logic.TOMBSTONE_FILE)
+        self.attachment_dir = os.path.join(self.directory, logic.ATTACHMENT_DIR)
+        self._items = None
+        self._tree = None
+
+    def is_active_vault(self):
+        return os.path.abspath(self.store.directory) == os.path.abspath(logic.VAULT_DIR)
+
+    def _load_records(self):
+        return self.store.load()
+
+    def items(self):
+        if self._items is None:
+            items = {target_id: tombstone(deleted_at)
+                     for target_id, deleted_at in logic.load_tombstones(self.tombstone_path).items()}
+            for entry in self._load_records():
+                items[logic.entry_id(entry)] = entry
+            self._items = items
+        return self._items
+
+    def count(self):
+        return len(self.items())
+
+    def tree(self, depth):
+        if self._tree is None or self._tree.depth != depth:
+            self._tree = MerkleTree(self.items(), depth)
+        return self._tree
+
+    def root(self, depth):
+        return self.tree(depth).node("")
+
+    def children(self, depth, prefixes):
+        return self.tree(depth).children(prefixes)
+
+    def buckets(self, depth, prefixes):
+        buckets = self.tree(depth).buckets
+        return {target_id: item for prefix in prefixes for target_id, item in buckets.get(prefix, {}).items()}
+
+    def apply(self, changes):
+        """Writes the winning versions to the journals; untouched records keep their order."""
+        if not changes:
+            return
+        tombstones = logic.load_tombstones(self.tombstone_path)
+        writes = {}
+        for target_id, item in changes.items():
+            if is_tombstone(item):
+                tombstones[target_id] = item["deleted_at"]
+                writes[target_id] = None
+            else:
+                tombstones.pop(target_id, None)
+                writes[target_id] = dict(item, id=target_id)
+
+        if self.is_active_vault():
+            # Goes through logic so the sync shows up in history and undo.
+            logic.apply_records(writes, history_op="sync")
+        else:
+            for target_id, item in writes.items():
+                if item is None:
+                    self.store.remove(target_id)
+                else:
+                    self.store.put(item)
+        logic.save_tombstones(tombstones, self.tombstone_path)
+        self._items = None
+        self._tree = None
+
+    def copy_blobs(self, refs, source):
+        """Copies the attachment blobs this copy lacks from another peer; returns how many."""
+        copied = 0
+        for ref in refs:
+            target = blob_path(self.attachment_dir, ref)
+            origin = blob_path(source.attachment_dir, ref)
+            if os.path.exists(target) or not os.path.exists(origin):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(origin, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            copied += 1
+        return copied
+
+
+# ------------------ Sync ------------------
+
+def sync(local, remote):
+    """Two-way merge of two peers; returns counts of what was compared and moved."""
+    depth = tree_depth(max(local.count(), remote.count()))
+    stats = {"depth": depth, "nodes_compared": 1, "records_exchanged": 0, "pulled": 0, "pushed": 0}
+
+    frontier = [""] if local.root(depth) != remote.root(depth) else []
+    for _ in range(depth):
+        if not frontier:
+            break
+        ours, theirs = local.children(depth, frontier), remote.children(depth, frontier)
+        keys = ours.keys() | theirs.keys()
+        stats["nodes_compared"] += len(keys)
+        frontier = sorted(prefix for prefix in keys if ours.get(prefix) != theirs.get(prefix))
+
+    ours, theirs = local.buckets(depth, frontier), remote.buckets(depth, frontier)
+    stats["records_exchanged"] = len(ours) + len(theirs)
+    pull, push = {}, {}
+    for target_id in ours.keys() | theirs.keys():
+        mine, other = ours.get(target_id), theirs.get(target_id)
+        if mine == other:
+            continue
+        winner = newer(mine, other)
+        if winner is not mine:
+            pull[target_id] = winner
+        if winner is not other:
+            push[target_id] = winner
+    # Blobs are content addressed, so the ones a moved record lists are
+    # copied across before the record lands.
+    stats["blobs_copied"] = (local.copy_blobs(logic.attachment_refs(pull.values()), remote)
+                             + remote.copy_blobs(logic.attachment_refs(push.values()), local))
+    local.apply(pull)
+    remote.apply(push)
+    stats["pulled"], stats["pushed"] = len(pull), len(push)
+    return stats
+
+
+def sync_directories(local_dir, remote_dir):
+    return sync(DirectoryPeer(local_dir), DirectoryPeer(remote_dir))
@@ -0,0 +1,150 @@
+import os
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+
+class TaskSignals(QObject):
+    result = Signal(object)
+    error = Signal(object)
+    item = Signal(object)
+
+
+# Futures stay referenced until their queued signal reaches the GUI thread.
+_in_flight = set()
+
+
+class TaskFuture:
+    """Handle for one background call; signals are delivered on the GUI thread."""
+
+    def __init__(self):
+        self.signals = TaskSignals()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        _in_flight.add(self)
+        self.signals.result.connect(self._release)
+        self.signals.error.connect(self._release)
+
+    def _release(self, *args):
+        _in_flight.discard(self)
+
+    def then(self, on_result=None, on_error=None):
+        # The task may already have emitted; replay the outcome on the next event loop pass.
+        with self._lock:
+            if not self._done.is_set():
+                if on_result is not None:
+                    self.signals.result.connect(on_result)
+                if on_error is not None:
+                    self.signals.error.connect(on_error)
+                return self
+        if self._error is not None and on_error is not None:
+            QTimer.singleShot(0, lambda: on_error(self._error))
+        elif self._error is None and on_result is not None:
+            QTimer.singleShot(0, lambda: on_result(self._result))
+        return self
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Blocks until finished; for scripts, never call this from the GUI thread."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Task did not finish in time.")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self._result, self._error = result, error
+            self._done.set()
+            if error is not None:
+                self.signals.error.emit(error)
+            else:
+                self.signals.result.emit(result)
+
+
+class _Task(QRunnable):
+    def __init__(self, fn, args, kwargs, future, on_complete=None):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.on_complete = on_complete
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.future._finish(error=e)
+        else:
+            self.future._finish(result=result)
+        finally:
+            if self.on_complete is not None:
+                self.on_complete()
+
+
+# ------------------ Write Queues ------------------
+#
+# Writes to the same file run one at a time, in submission order, without
+# parking a pool thread on a lock while they wait.
+
+_queues_lock = threading.Lock()
+_write_queues = {}     # absolute path -> deque of pending tasks (head is running)
+
+
+def _start_next(path):
+    with _queues_lock:
+        pending = _write_queues[path]
+        pending.popleft()
+        if not pending:
+            del _write_queues[path]
+            return
+        task = pending[0]
+    QThreadPool.globalInstance().start(task)
+
+
+def run_in_background(fn, *args, write_path=None, **kwargs):
+    """Runs fn(*args, **kwargs) on the global QThreadPool and returns a TaskFuture.
+
+    Pass write_path for calls that write a vault file so that writes to the
+    same file are serialized.
+    """
+    future = TaskFuture()
+    if write_path is None:
+        QThreadPool.globalInstance().start(_Task(fn, args, kwargs, future))
+        return future
+
+    path = os.path.abspath(write_path)
+    task = _Task(fn, args, kwargs, future, on_complete=lambda: _start_next(path))
+    with _queues_lock:
+        pending = _write_queues.setdefault(path, deque())
+        pending.append(task)
+        start_now = len(pending) == 1
+    if start_now:
+        QThreadPool.globalInstance().start(task)
+    return future
+
+
+def stream_in_background(fn, *args, on_item=None, **kwargs):
+    """Runs the generator function fn on the global QThreadPool.
+
+    Each yielded value reaches on_item on the GUI thread, in order and
+    before the future's result (the number of items).
+    """
+    future = TaskFuture()
+    if on_item is not None:
+        future.signals.item.connect(on_item)
+
+    def drain():
+        count = 0
+        for item in fn(*args, **kwargs):
+            future.signals.item.emit(item)
+            count += 1
+        return count
+
+    QThreadPool.globalInstance().start(_Task(drain, (), {}, future))
+    return future
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+
+# ------------------ Settings ------------------
+#
+# Tracing is switched on by setting AEGISVAULT_TRACE before start-up, either
+# to a file path or to "1" for TRACE_FILE. Spans are recorded as Chrome
+# trace "complete" events and written out at exit; the file opens in
+# chrome://tracing (about:tracing) or https://ui.perfetto.dev.
+#
+# When it is off, traced() hands back the undecorated function and span()
+# returns a shared do-nothing context manager, so instrumented code pays
+# one global lookup at most.
+
+TRACE_ENV = "AEGISVAULT_TRACE"
+TRACE_FILE = "aegisvault_trace.json"
+MAX_EVENTS = 1_000_000           # later spans are counted but not kept
+
+_target = os.environ.get(TRACE_ENV, "").strip()
+enabled = _target not in ("", "0")
+trace_path = (TRACE_FILE if _target == "1" else _target) if enabled else None
+
+_events = []
+_dropped = 0
+_thread_names = {}
+_pid = os.getpid()
+_clock = time.perf_counter_ns
+
+
+def _record(name, category, start_ns, end_ns, args):
+    global _dropped
+    if len(_events) >= MAX_EVENTS:
+        _dropped += 1
+        return
+    thread = threading.current_thread()
+    _thread_names.setdefault(thread.ident, thread.name)
+    event = {
+        "name": name, "cat": category, "ph": "X", "pid": _pid, "tid": thread.ident,
+        "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,
+    }
+    if args:
+        event["args"] = args
+    # list.append is atomic, so worker threads can record without a lock.
+    _events.append(event)
+
+
+# ------------------ Spans ------------------
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        """Attaches values known only once the work is done, e.g. a row count."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.category, self.start, _clock(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category="app", **args):
+    """with span("viewer.populate", rows=n): ..."""
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args)
+
+
+def traced(name=None, category=None):
+    """Decorator recording one span per call; returns fn untouched when tracing is off."""
+    def decorate(fn):
+        if not enabled:
+            return fn
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        span_category = category or fn.__module__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = _clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(span_name, span_category, start, _clock(), None)
+        return wrapper
+    return decorate
+
+
+# ------------------ Export ------------------
+
+def write_trace(path=None):
+    """Writes the spans recorded so far in Chrome trace format; returns the path, or None when off."""
+    path = path or trace_path
+    if not path:
+        return None
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": _pid, "tid": ident, "args": {"name": thread_name}}
+        for ident, thread_name in list(_thread_names.items())
+    ]
+    trace = {
+        "traceEvents": metadata + list(_events),
+        "displayTimeUnit": "ms",
+        "otherData": {"dropped_events": _dropped},
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(trace, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+if enabled:
+    atexit.register(write_trace)
@@ -1,12 +1,47 @@
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QHBoxLayout,
-    QLineEdit, QComboBox, QSizePolicy, QFrame, QAbstractItemView, QLabel, QMessageBox
+    QLineEdit, QComboBox, QSizePolicy, QFrame, QAbstractItemView, QLabel, QMessageBox,
+    QDialog, QFormLayout, QDialogButtonBox, QInputDialog
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QFont, QPixmap, QGuiApplication
-from logic import get_decrypted_vault, save_vault
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QIcon, QFont, QPixmap, QGuiApplication, QColor, QKeySequence, QShortcut
+from logic import (
+    stream_vault, vault_names, update_entry, delete_entry, decrypt_entries, password_fingerprint, entry_id,
+    matches_search, sort_key, VAULT_DIR
+)
+from breach_check import BreachChecker
+from vault_trace import traced, span
+from vault_metrics import histogram, timed
+from vault_records import RecordTable, RecordView
+from vault_domains import DomainIndex, parse_url
+from health_dashboard import VaultHealth
+from rotation_scheduler import RotationScheduler
+from authenticator import CodeScheduler
+from vault_watcher import VaultWatcher
+from vault_tasks import run_in_background, stream_in_background
+from vault_history import default_history
+
+ALL_VAULTS = "All Vaults"
+FIRST_PAGE_ROWS = 50        # rows decrypted and shown before anything else is parsed
+STREAM_BATCH_ROWS = 1000    # rows per batch after the first page
+DEFAULT_VAULTS = ["Personal", "Work", "Bank", "Ghost"]
+
+_search_latency = histogram("aegisvault_search_seconds", "Time to filter and sort the vault for one search keystroke.")
+
+# (field, reverse) for each entry of the sort combo, in order.
+SORT_OPTIONS = [
+    ("app_name", False),
+    ("app_name", True),
+    ("username", False),
+    ("username", True),
+    ("vault", False),
+    ("vault", True),
+    ("date_added", True),
+    ("date_added", False),
+]
 
 def add_icon_to_lineedit(line_edit: QLineEdit, icon_path: str):
     icon_label = QLabel(line_edit)
@@ -23,6 +58,11 @@ def add_icon_to_lineedit(line_edit: QLineEdit, icon_path: str):
         QLineEdit.resizeEvent(line_edit, event)
     line_edit.resizeEvent = adjust_icon_position
 
+def readable_password(entry):
+    # None for entries whose password failed to decrypt; the placeholder isn't a password.
+    return None if entry.get("decrypt_error") else entry["password"]
+
+
 def check_password_strength(password: str):
     import re
     length = len(password)
@@ -36,9 +76,9 @@ def check_password_strength(password: str):
     return "Weak"
 
 class StarIconLabel(QLabel):
-    def __init__(self, is_starred, row, toggle_callback, parent=None):
+    def __init__(self, is_starred, entry_id, toggle_callback, parent=None):
         super().__init__(parent)
-        self.row = row
+        self.entry_id = entry_id
         self.toggle_callback = toggle_callback
         star_path = os.path.join("assets", "star.png" if is_starred else "unstar.png")
         pixmap = QPixmap(star_path)
@@ -49,18 +89,91 @@ class StarIconLabel(QLabel):
         self.setCursor(Qt.PointingHandCursor)
 
     def mousePressEvent(self, event):
-        self.toggle_callback(self.row)
+        self.toggle_callback(self.entry_id)
+
+class EditEntryDialog(QDialog):
+    """Edits one entry; changes() returns only the fields that differ."""
+
+    def __init__(self, entry, vaults, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Edit Entry")
+        self.entry = entry
+        form = QFormLayout(self)
+
+        self.app_input = QLineEdit(entry["app_name"])
+        self.username_input = QLineEdit(entry["username"])
+        self.password_input = QLineEdit(entry["password"])
+        self.password_input.setEchoMode(QLineEdit.Password)
+        self.vault_input = QComboBox()
+        self.vault_input.addItems(vaults)
+        self.vault_input.setCurrentText(entry["vault"])
+        self.urls_input = QLineEdit(", ".join(entry.get("urls") or ()))
+        self.urls_input.setPlaceholderText("https://example.com, https://login.example.com")
+        form.addRow("Application", self.app_input)
+        form.addRow("Username", self.username_input)
+        form.addRow("Password", self.password_input)
+        form.addRow("Vault", self.vault_input)
+        form.addRow("Websites", self.urls_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    def changes(self):
+        values = {
+            "app_name": self.app_input.text().strip(),
+            "username": self.username_input.text().strip(),
+            "password": self.password_input.text(),
+            "vault": self.vault_input.currentText(),
+        }
+        changes = {field: value for field, value in values.items() if value and value != self.entry[field]}
+        urls = [url.strip() for url in self.urls_input.text().split(",") if url.strip()]
+        if urls != list(self.entry.get("urls") or ()):
+            changes["urls"] = urls
+        return changes
+
+    def accept(self):
+        for url in self.urls_input.text().split(","):
+            if url.strip():
+                try:
+                    parse_url(url)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Invalid Website", str(e))
+                    return
+        super().accept()
+
 
 class VaultViewerScreen(QWidget):
+    # Seconds from the first shard requested to the last one shown, after each load.
+    vault_loaded = Signal(float)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("AegisVault - Vault Viewer")
         self.setMinimumSize(950, 560)
         self.setStyleSheet(self.main_style())
 
-        self.vault_data = []
-        self.filtered_data = []
+        # Slotted records indexed by ID; the table shows a view of slots in display order.
+        self.vault_data = RecordTable()
+        self.loading_vaults = set()
+        self.load_started = 0.0
+        self.filtered_data = RecordView(self.vault_data)
         self.starred = set()
+        self.breach_checker = BreachChecker()
+        self.breached = set()
+        self.health = VaultHealth()
+        self.reuse_index = self.health.reuse_index
+        # Saved websites of the loaded entries, for quick fill.
+        self.domain_index = DomainIndex()
+        self.row_for_id = {}
+        self.rotation_scheduler = RotationScheduler(parent=self)
+        self.rotation_scheduler.entry_due.connect(self.mark_rotation_due)
+        self.rotation_scheduler.entry_due.connect(self.health.set_old)
+        self.code_scheduler = CodeScheduler(self)
+        self.code_scheduler.codes_updated.connect(self.update_codes)
+        self.vault_watcher = VaultWatcher(parent=self)
+        self.vault_watcher.changes_ready.connect(self.apply_vault_changes)
 
         layout = QVBoxLayout(self)
         layout.setSpacing(18)
@@ -74,11 +187,22 @@ class VaultViewerScreen(QWidget):
         self.search_input.setPlaceholderText("Search for Application, Username, or Vault...")
         self.search_input.setFixedHeight(38)
         self.search_input.setStyleSheet(self.search_style())
-        self.search_input.textChanged.connect(self.apply_search_and_sort)
+        # The signal's argument isn't wanted, and a traced wrapper would pass it on.
+        self.search_input.textChanged.connect(lambda *_: self.apply_search_and_sort())
         add_icon_to_lineedit(self.search_input, os.path.join("assets", "search.png"))
         self.search_input.setMinimumWidth(340)
         top_bar.addWidget(self.search_input, 2)
 
+        # Picking one vault mounts only that vault's shard.
+        self.vault_combo = QComboBox()
+        self.vault_combo.setEditable(False)
+        self.vault_combo.setFixedHeight(38)
+        self.vault_combo.setFixedWidth(150)
+        self.vault_combo.setStyleSheet(self.combobox_style())
+        self.vault_combo.addItems([ALL_VAULTS] + DEFAULT_VAULTS)
+        self.vault_combo.currentIndexChanged.connect(self.ensure_mounted)
+        top_bar.addWidget(self.vault_combo, 0)
+
         sort_combo_row = QHBoxLayout()
         sort_combo_row.setSpacing(0)
         sort_combo_row.setContentsMargins(0, 0, 0, 0)
@@ -98,7 +222,7 @@ class VaultViewerScreen(QWidget):
             "Date Added (Newest)",
             "Date Added (Oldest)"
         ])
-        self.sort_combo.currentIndexChanged.connect(self.apply_search_and_sort)
+        self.sort_combo.currentIndexChanged.connect(lambda *_: self.apply_search_and_sort())
         sort_combo_row.addWidget(self.sort_combo)
 
         self.filter_btn = QPushButton()
@@ -127,7 +251,7 @@ class VaultViewerScreen(QWidget):
 
         # --- Table ---
         self.table = QTableWidget()
-        self.table.setColumnCount(8)  # <-- Added column for copy button
+        self.table.setColumnCount(10)  # <-- Added column for copy button
         self.table.setHorizontalHeaderLabels([
             "",  # Starred
             "Application",
@@ -136,7 +260,9 @@ class VaultViewerScreen(QWidget):
             "",  # Copy icon
             "Vault",
             "Date Added",
-            "Strength"
+            "Strength",
+            "Alerts",
+            "Code"
         ])
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setSelectionBehavior(QTableWidget.SelectRows)
@@ -154,6 +280,10 @@ class VaultViewerScreen(QWidget):
 
         # --- Bottom bar with Refresh, Edit, Delete Buttons ---
         btn_layout = QHBoxLayout()
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #78A083; font-size: 14px; font-style: italic; background: transparent;")
+        btn_layout.addWidget(self.status_label)
         btn_layout.addStretch(1)
 
         self.refresh_btn = QPushButton("Refresh Vault")
@@ -161,9 +291,41 @@ class VaultViewerScreen(QWidget):
         self.refresh_btn.setFixedHeight(40)
         self.refresh_btn.setFixedWidth(170)
         self.refresh_btn.setStyleSheet(self.button_style())
-        self.refresh_btn.clicked.connect(self.load_vault_entries)
+        self.refresh_btn.clicked.connect(self.vault_watcher.check)
         btn_layout.addWidget(self.refresh_btn)
 
+        self.undo_btn = QPushButton("Undo")
+        self.undo_btn.setFixedHeight(40)
+        self.undo_btn.setFixedWidth(100)
+        self.undo_btn.setStyleSheet(self.button_style())
+        self.undo_btn.clicked.connect(self.undo_change)
+        btn_layout.addWidget(self.undo_btn)
+
+        self.redo_btn = QPushButton("Redo")
+        self.redo_btn.setFixedHeight(40)
+        self.redo_btn.setFixedWidth(100)
+        self.redo_btn.setStyleSheet(self.button_style())
+        self.redo_btn.clicked.connect(self.redo_change)
+        btn_layout.addWidget(self.redo_btn)
+
+        QShortcut(QKeySequence.Undo, self, self.undo_change)
+        QShortcut(QKeySequence.Redo, self, self.redo_change)
+        QShortcut(QKeySequence("Ctrl+Shift+L"), self, self.quick_fill)
+
+        self.health_btn = QPushButton("Vault Health")
+        self.health_btn.setIcon(QIcon(os.path.join("assets", "strong.png")))
+        self.health_btn.setFixedHeight(40)
+        self.health_btn.setFixedWidth(170)
+        self.health_btn.setStyleSheet(self.button_style())
+        btn_layout.addWidget(self.health_btn)
+
+        self.edit_btn = QPushButton("Edit Selected")
+        self.edit_btn.setFixedHeight(40)
+        self.edit_btn.setFixedWidth(170)
+        self.edit_btn.setStyleSheet(self.button_style())
+        self.edit_btn.clicked.connect(self.edit_selected_entry)
+        btn_layout.addWidget(self.edit_btn)
+
         self.delete_btn = QPushButton("Delete Selected")
         self.delete_btn.setIcon(QIcon(os.path.join("assets", "delete.png")))
         self.delete_btn.setFixedHeight(40)
@@ -174,131 +336,392 @@ class VaultViewerScreen(QWidget):
 
         layout.addLayout(btn_layout)
 
-        self.load_vault_entries()
+        # Nothing is read until the viewer is first shown (see ensure_mounted).
 
-    def load_vault_entries(self):
-        self.vault_data = get_decrypted_vault()
-        for entry in self.vault_data:
-            if "date_added" not in entry:
-                entry["date_added"] = datetime.now().isoformat()
-            if "id" not in entry:
-                entry["id"] = f"{entry['username']}::{entry['app_name']}"
-        self.apply_search_and_sort()
+    def selected_vaults(self):
+        vault = self.vault_combo.currentText()
+        if vault == ALL_VAULTS:
+            return list(dict.fromkeys(DEFAULT_VAULTS + vault_names()))
+        return [vault]
 
-    def apply_search_and_sort(self):
+    def ensure_mounted(self):
+        """Loads the shards of the selected vaults that aren't shown yet, else picks up changes.
+
+        Returns whether a load was started.
+        """
+        self.vault_watcher.follow_new = self.vault_combo.currentText() == ALL_VAULTS
+        mounted = self.vault_watcher.mounted() | self.loading_vaults
+        missing = [vault for vault in self.selected_vaults() if vault not in mounted]
+        if missing:
+            self.load_vault_entries(missing)
+        else:
+            self.vault_watcher.check()
+            self.apply_search_and_sort()
+        return bool(missing)
+
+    def load_vault_entries(self, vaults):
+        # Rows arrive in batches; the watcher waits until the shards are fully read.
+        if not self.loading_vaults:
+            self.load_started = time.perf_counter()
+        self.loading_vaults.update(vaults)
+        self.vault_watcher.paused = True
+        self.vault_watcher.mount([], vaults)
+        self.set_busy(True, "Decrypting vault...")
+        stream_in_background(self.read_vault, vaults, on_item=self.show_loaded_batch).then(
+            lambda count: self.finish_loading(vaults),
+            self.on_vault_error
+        )
+
+    def read_vault(self, vaults):
+        # Runs on a worker thread: file I/O, decryption and breach lookups only, no widgets.
+        batch, size = [], FIRST_PAGE_ROWS
+        for vault in vaults:
+            for record in stream_vault(vault):
+                batch.append(record)
+                if len(batch) >= size:
+                    yield self.decrypt_batch(batch)
+                    batch, size = [], STREAM_BATCH_ROWS
+        if batch:
+            yield self.decrypt_batch(batch)
+
+    def decrypt_batch(self, raw_data):
+        with span("viewer.decrypt_batch", "viewer", rows=len(raw_data)):
+            entries = decrypt_entries(raw_data)
+            with span("viewer.prepare_entries", "viewer"):
+                for entry in entries:
+                    self.prepare_entry(entry)
+            # Breach lookups run once per load, not on every repaint.
+            with span("viewer.breach_check", "viewer"):
+                flags = self.breach_checker.check_many(map(readable_password, entries))
+        return raw_data, entries, flags
+
+    @traced()
+    def show_loaded_batch(self, batch):
+        raw_data, entries, flags = batch
+        self.vault_watcher.mount(raw_data, [])
+        for entry in entries:
+            self.remove_entry_row(entry["id"])
+        self.breached.update(entry["id"] for entry, hit in zip(entries, flags) if hit)
+        # Tracked from the decrypted dicts: the table's records don't keep the fingerprint.
+        for entry in entries:
+            self.track_entry(entry)
+        entries = self.vault_data.extend(entries)
+        # Dates are parsed once here; repaints ask the scheduler instead.
+        self.rotation_scheduler.add_many(entries)
+        self.append_rows(entries)
+        self.status_label.setText(f"Loading... {len(self.vault_data)} entries")
+
+    @traced()
+    def append_rows(self, entries):
+        # Rows stream in at the bottom; finish_loading puts them in sort order.
         search_text = self.search_input.text().lower().strip()
-        if search_text:
-            self.filtered_data = [
-                entry for entry in self.vault_data
-                if search_text in entry["app_name"].lower()
-                or search_text in entry["username"].lower()
-                or search_text in entry["vault"].lower()
-            ]
+        key, reverse = self.sort_key()
+        visible = sorted((e for e in entries if self.is_visible(e, search_text)), key=key, reverse=reverse)
+        start = len(self.filtered_data)
+        self.filtered_data.extend(visible)
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(self.filtered_data))
+        for row, entry in enumerate(visible, start):
+            self.row_for_id[entry["id"]] = row
+            self.fill_row(row, entry)
+        self.table.blockSignals(False)
+
+    @traced()
+    def finish_loading(self, vaults):
+        self.loading_vaults.difference_update(vaults)
+        self.vault_watcher.paused = bool(self.loading_vaults)
+        self.apply_search_and_sort()
+        self.set_busy(False)
+        # Picks up anything written while the shards were being read.
+        self.vault_watcher.check()
+        if not self.loading_vaults:
+            self.vault_loaded.emit(time.perf_counter() - self.load_started)
+
+    def set_busy(self, busy, message=""):
+        self.status_label.setText(message if busy else "")
+        for button in (self.refresh_btn, self.undo_btn, self.redo_btn, self.edit_btn, self.delete_btn):
+            button.setEnabled(not busy)
+        if busy:
+            self.setCursor(Qt.BusyCursor)
         else:
-            self.filtered_data = self.vault_data.copy()
-        sort_index = self.sort_combo.currentIndex()
-        if sort_index == 0:
-            self.filtered_data.sort(key=lambda x: x["app_name"].lower())
-        elif sort_index == 1:
-            self.filtered_data.sort(key=lambda x: x["app_name"].lower(), reverse=True)
-        elif sort_index == 2:
-            self.filtered_data.sort(key=lambda x: x["username"].lower())
-        elif sort_index == 3:
-            self.filtered_data.sort(key=lambda x: x["username"].lower(), reverse=True)
-        elif sort_index == 4:
-            self.filtered_data.sort(key=lambda x: x["vault"].lower())
-        elif sort_index == 5:
-            self.filtered_data.sort(key=lambda x: x["vault"].lower(), reverse=True)
-        elif sort_index == 6:
-            self.filtered_data.sort(key=lambda x: x.get("date_added", ""), reverse=True)
-        elif sort_index == 7:
-            self.filtered_data.sort(key=lambda x: x.get("date_added", ""))
+            self.unsetCursor()
+
+    def on_vault_error(self, error):
+        self.loading_vaults.clear()
+        self.vault_watcher.paused = False
+        self.set_busy(False)
+        QMessageBox.warning(self, "Vault Error", f"Vault operation failed:\n{error}")
+
+    def prepare_entry(self, entry):
+        if "date_added" not in entry:
+            entry["date_added"] = datetime.now().isoformat()
+        entry["id"] = entry_id(entry)
+        if "fingerprint" not in entry and not entry.get("decrypt_error"):
+            entry["fingerprint"] = password_fingerprint(entry["password"])
+
+    def track_entry(self, entry):
+        # Unreadable passwords are left out of the reuse groups and the strength count.
+        password = readable_password(entry)
+        self.health.add_entry(
+            entry["id"], entry["vault"], None if password is None else entry.get("fingerprint"),
+            weak=password is not None and check_password_strength(password) == "Weak",
+            breached=entry["id"] in self.breached
+        )
+        self.domain_index.add_entry(entry)
+
+    def untrack_entry(self, target_id):
+        self.health.remove_entry(target_id)
+        self.domain_index.remove(target_id)
+        self.rotation_scheduler.remove(target_id)
+        self.breached.discard(target_id)
+
+    def matches_search(self, entry, search_text):
+        return matches_search(entry, search_text)
+
+    def is_visible(self, entry, search_text):
+        vault = self.vault_combo.currentText()
+        if vault != ALL_VAULTS and entry["vault"] != vault:
+            return False
+        return not search_text or self.matches_search(entry, search_text)
+
+    def sort_key(self):
+        field, reverse = SORT_OPTIONS[max(self.sort_combo.currentIndex(), 0)]
+        return sort_key(field), reverse
+
+    @traced()
+    def apply_search_and_sort(self):
+        vault = self.vault_combo.currentText()
+        field, reverse = SORT_OPTIONS[max(self.sort_combo.currentIndex(), 0)]
+        # Runs on every keystroke, so this is the search latency users feel.
+        with _search_latency.time():
+            self.filtered_data = self.vault_data.select(
+                self.search_input.text(), None if vault == ALL_VAULTS else vault, field, reverse)
         self.populate_table()
 
+    @traced()
+    @timed("aegisvault_render_seconds", "Time to rebuild the vault table.")
     def populate_table(self):
         self.table.blockSignals(True)
         self.table.setRowCount(len(self.filtered_data))
+        self.row_for_id = {}
         for row, entry in enumerate(self.filtered_data):
-            unique_id = entry.get('id', f"{entry['username']}::{entry['app_name']}")
-            is_starred = unique_id in self.starred
-            star_label = StarIconLabel(is_starred, row, self.toggle_star)
-            self.table.setCellWidget(row, 0, star_label)
-
-            # Application (not editable)
-            app_item = QTableWidgetItem(entry["app_name"])
-            app_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 1, app_item)
-
-            # Username (not editable)
-            user_item = QTableWidgetItem(entry["username"])
-            user_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 2, user_item)
-
-            # Password (masked, toggle on double click)
-            masked_password = "●" * max(len(entry["password"]), 8)
-            pwd_item = QTableWidgetItem(masked_password)
-            pwd_item.setData(Qt.UserRole, entry["password"])
-            pwd_item.setData(Qt.UserRole + 1, "masked")
-            pwd_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            date_str = entry.get("date_added", "")
-            try:
-                date_obj = datetime.fromisoformat(date_str)
-            except Exception:
-                date_obj = datetime.now()
-            if datetime.now() - date_obj > timedelta(days=180):
-                icon = QIcon(os.path.join("assets", "clock.png"))
-                pwd_item.setIcon(icon)
-            self.table.setItem(row, 3, pwd_item)
-
-            # Copy button
-            copy_btn = QPushButton()
-            copy_btn.setFixedSize(30, 30)
-            copy_btn.setIcon(QIcon(os.path.join("assets", "copy.png")))
-            copy_btn.setStyleSheet("background: transparent; border: none;")
-            copy_btn.setToolTip("Copy password")
-            copy_btn.clicked.connect(lambda checked, r=row: self.copy_password_to_clipboard(r))
-            self.table.setCellWidget(row, 4, copy_btn)
-
-            # Vault (not editable)
-            vault_item = QTableWidgetItem(entry["vault"])
-            vault_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 5, vault_item)
-
-            # Date Added (not editable)
-            date_item = QTableWidgetItem(date_obj.strftime("%Y-%m-%d"))
-            date_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 6, date_item)
-
-            # Strength (not editable)
-            strength = check_password_strength(entry["password"])
-            icon_path = "strong.png" if strength == "Strong" else "weak.png"
-            strength_item = QTableWidgetItem("")
-            strength_item.setIcon(QIcon(os.path.join("assets", icon_path)))
-            strength_item.setText(strength)
-            strength_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.table.setItem(row, 7, strength_item)
+            self.row_for_id[entry["id"]] = row
+            self.fill_row(row, entry)
+        self.code_scheduler.set_visible(self.filtered_data)
         self.table.resizeColumnsToContents()
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.blockSignals(False)
 
-    def copy_password_to_clipboard(self, row):
-        if 0 <= row < len(self.filtered_data):
+    def fill_row(self, row, entry):
+        unique_id = entry["id"]
+        is_starred = unique_id in self.starred
+        star_label = StarIconLabel(is_starred, unique_id, self.toggle_star)
+        self.table.setCellWidget(row, 0, star_label)
+
+        # Application (not editable)
+        app_item = QTableWidgetItem(entry["app_name"])
+        app_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 1, app_item)
+
+        # Username (not editable)
+        user_item = QTableWidgetItem(entry["username"])
+        user_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 2, user_item)
+
+        # Password (masked, toggle on double click)
+        masked_password = "●" * max(len(entry["password"]), 8)
+        pwd_item = QTableWidgetItem(masked_password)
+        pwd_item.setData(Qt.UserRole, entry["password"])
+        pwd_item.setData(Qt.UserRole + 1, "masked")
+        pwd_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        date_obj = self.rotation_scheduler.added_at(unique_id) or datetime.now()
+        if self.rotation_scheduler.is_due(unique_id):
+            icon = QIcon(os.path.join("assets", "clock.png"))
+            pwd_item.setIcon(icon)
+        self.table.setItem(row, 3, pwd_item)
+
+        # Copy button
+        copy_btn = QPushButton()
+        copy_btn.setFixedSize(30, 30)
+        copy_btn.setIcon(QIcon(os.path.join("assets", "copy.png")))
+        copy_btn.setStyleSheet("background: transparent; border: none;")
+        copy_btn.setToolTip("Copy password")
+        copy_btn.clicked.connect(lambda checked, i=unique_id: self.copy_password_to_clipboard(i))
+        self.table.setCellWidget(row, 4, copy_btn)
+
+        # Vault (not editable)
+        vault_item = QTableWidgetItem(entry["vault"])
+        vault_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 5, vault_item)
+
+        # Date Added (not editable)
+        date_item = QTableWidgetItem(date_obj.strftime("%Y-%m-%d"))
+        date_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 6, date_item)
+
+        # Strength (not editable)
+        strength = check_password_strength(entry["password"])
+        icon_path = "strong.png" if strength == "Strong" else "weak.png"
+        strength_item = QTableWidgetItem("")
+        strength_item.setIcon(QIcon(os.path.join("assets", icon_path)))
+        strength_item.setText(strength)
+        strength_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 7, strength_item)
+
+        # Alerts (not editable)
+        self.fill_alerts(row, unique_id)
+
+        # Authenticator code (filled in by the code scheduler)
+        code_item = QTableWidgetItem(self.code_scheduler.current_code(unique_id))
+        code_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 9, code_item)
+
+    def fill_alerts(self, row, unique_id):
+        alerts = []
+        tooltips = []
+        if unique_id in self.breached:
+            alerts.append("Breached")
+            tooltips.append("This password appears in a known data breach. Change it.")
+        reuse_count = self.reuse_index.count(unique_id)
+        if reuse_count > 1:
+            alerts.append(f"Reused across {reuse_count} entries")
+            tooltips.append("The same password is used by other entries.")
+        alerts_item = QTableWidgetItem(", ".join(alerts))
+        if alerts:
+            alerts_item.setForeground(QColor("#FF6666"))
+            alerts_item.setToolTip("\n".join(tooltips))
+        alerts_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
+        self.table.setItem(row, 8, alerts_item)
+
+    def insert_position(self, entry):
+        # Binary search in the current sort order; equal keys go after existing rows.
+        key, reverse = self.sort_key()
+        new_key = key(entry)
+        lo, hi = 0, len(self.filtered_data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = key(self.filtered_data[mid])
+            if (new_key > mid_key) if reverse else (new_key < mid_key):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def remove_entry_row(self, target_id):
+        if self.vault_data.remove(target_id) is None:
+            return
+        self.untrack_entry(target_id)
+        row = self.row_for_id.pop(target_id, None)
+        if row is not None:
+            del self.filtered_data[row]
+            self.table.removeRow(row)
+            self.reindex_rows(row)
+
+    def insert_entry_row(self, entry):
+        self.track_entry(entry)
+        entry = self.vault_data.add(entry)
+        self.rotation_scheduler.add(entry)
+        if not self.is_visible(entry, self.search_input.text().lower().strip()):
+            return
+        row = self.insert_position(entry)
+        self.filtered_data.insert(row, entry)
+        self.table.insertRow(row)
+        self.reindex_rows(row)
+        self.fill_row(row, entry)
+
+    def reindex_rows(self, start=0):
+        for row in range(start, len(self.filtered_data)):
+            self.row_for_id[self.filtered_data[row]["id"]] = row
+
+    @traced()
+    def apply_vault_changes(self, inserted, updated, deleted):
+        """Applies a diff from the vault watcher row by row instead of rebuilding the table."""
+        self.table.blockSignals(True)
+        affected = set()
+        # Inserted IDs are dropped too in case a load already showed them; a row is never listed twice.
+        for target_id in list(deleted) + [entry["id"] for entry in list(updated) + list(inserted)]:
+            affected |= self.reuse_index.members(target_id)
+            self.remove_entry_row(target_id)
+        changed = list(updated) + list(inserted)
+        for entry in changed:
+            self.prepare_entry(entry)
+        flags = self.breach_checker.check_many(map(readable_password, changed))
+        for entry, hit in zip(changed, flags):
+            if hit:
+                self.breached.add(entry["id"])
+            self.insert_entry_row(entry)
+            affected |= self.reuse_index.members(entry["id"])
+        # Reuse counts of the other members of touched groups may have changed.
+        for target_id in affected:
+            row = self.row_for_id.get(target_id)
+            if row is not None:
+                self.fill_alerts(row, target_id)
+        self.code_scheduler.set_visible(self.filtered_data)
+        self.table.blockSignals(False)
+
+    def update_codes(self, codes):
+        # Only the code column changes on a step boundary.
+        for target_id, code in codes.items():
+            row = self.row_for_id.get(target_id)
+            item = self.table.item(row, 9) if row is not None else None
+            if item is not None:
+                item.setText(code)
+
+    def mark_rotation_due(self, target_id):
+        row = self.row_for_id.get(target_id)
+        item = self.table.item(row, 3) if row is not None else None
+        if item is not None:
+            item.setIcon(QIcon(os.path.join("assets", "clock.png")))
+
+    def copy_password_to_clipboard(self, target_id):
+        row = self.row_for_id.get(target_id)
+        if row is not None:
             password = self.filtered_data[row]["password"]
             QGuiApplication.clipboard().setText(password)
             QMessageBox.information(self, "Copied", "Password copied to clipboard!")
 
+    def quick_fill(self):
+        """Copies the password saved for a website; the URL is taken from the clipboard when it holds one."""
+        clipboard = QGuiApplication.clipboard().text().strip()
+        suggested = clipboard if clipboard and " " not in clipboard and "." in clipboard else ""
+        url, ok = QInputDialog.getText(self, "Quick Fill", "Website URL:", text=suggested)
+        if not ok or not url.strip():
+            return
+        try:
+            matches = [self.vault_data.get(target_id) for target_id in self.domain_index.lookup(url)]
+        except ValueError as e:
+            QMessageBox.warning(self, "Quick Fill", str(e))
+            return
+        if not matches:
+            QMessageBox.information(self, "Quick Fill", f"No entry is saved for {url.strip()}.")
+            return
+        entry = matches[0]
+        if len(matches) > 1:
+            # Best match first, so Enter takes it.
+            labels = [f"{e['app_name']} ({e['username']})" for e in matches]
+            label, ok = QInputDialog.getItem(self, "Quick Fill", "Several entries match:", labels, 0, False)
+            if not ok:
+                return
+            entry = matches[labels.index(label)]
+        QGuiApplication.clipboard().setText(entry["password"])
+        row = self.row_for_id.get(entry["id"])
+        if row is not None:
+            self.table.selectRow(row)
+        QMessageBox.information(self, "Copied", f"Password for {entry['app_name']} copied to clipboard!")
+
     def handle_star_click(self, row, column):
-        if column == 0:
-            self.toggle_star(row)
+        if column == 0 and 0 <= row < len(self.filtered_data):
+            self.toggle_star(self.filtered_data[row]["id"])
 
-    def toggle_star(self, row):
-        entry = self.filtered_data[row]
-        unique_id = entry.get('id', f"{entry['username']}::{entry['app_name']}")
-        if unique_id in self.starred:
-            self.starred.remove(unique_id)
+    def toggle_star(self, target_id):
+        if target_id in self.starred:
+            self.starred.remove(target_id)
         else:
-            self.starred.add(unique_id)
-        self.populate_table()
+            self.starred.add(target_id)
+        row = self.row_for_id.get(target_id)
+        if row is not None:
+            star_label = StarIconLabel(target_id in self.starred, target_id, self.toggle_star)
+            self.table.setCellWidget(row, 0, star_label)
 
     def toggle_password_visibility(self, row, column):
         if column == 3:
@@ -313,6 +736,29 @@ class VaultViewerScreen(QWidget):
                 item.setText(masked_password)
                 item.setData(Qt.UserRole + 1, "masked")
 
+    def edit_selected_entry(self):
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.filtered_data):
+            QMessageBox.information(self, "Edit Entry", "Please select a row to edit.")
+            return
+        entry = self.filtered_data[row]
+        dialog = EditEntryDialog(entry, list(dict.fromkeys(DEFAULT_VAULTS + vault_names())), self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        changes = dialog.changes()
+        if not changes:
+            return
+        self.set_busy(True, "Saving entry...")
+        # Only this record is rewritten; the watcher brings the new version back as a row update.
+        run_in_background(update_entry, entry["id"], write_path=VAULT_DIR, **changes).then(
+            lambda stored: self.on_entry_edited(),
+            self.on_vault_error
+        )
+
+    def on_entry_edited(self):
+        self.set_busy(False)
+        self.vault_watcher.check()
+
     def delete_selected_entry(self):
         row = self.table.currentRow()
         if row < 0 or row >= len(self.filtered_data):
@@ -324,11 +770,37 @@ class VaultViewerScreen(QWidget):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            entry_id = self.filtered_data[row]['id']
-            self.vault_data = [entry for entry in self.vault_data if entry['id'] != entry_id]
-            self.filtered_data = [entry for entry in self.filtered_data if entry['id'] != entry_id]
-            save_vault(self.vault_data)
-            self.populate_table()
+            target_id = self.filtered_data[row]['id']
+            self.set_busy(True, "Deleting entry...")
+            run_in_background(delete_entry, target_id, write_path=VAULT_DIR).then(
+                lambda found: self.on_entry_deleted(target_id),
+                self.on_vault_error
+            )
+
+    def on_entry_deleted(self, target_id):
+        self.vault_watcher.discard([target_id])
+        self.apply_vault_changes([], [], [target_id])
+        self.set_busy(False)
+
+    def undo_change(self):
+        self.step_history(default_history().undo, "Undoing...")
+
+    def redo_change(self):
+        self.step_history(default_history().redo, "Redoing...")
+
+    def step_history(self, step, message):
+        if not self.undo_btn.isEnabled():
+            return
+        self.set_busy(True, message)
+        # The rewritten file comes back through the watcher as a row-level diff.
+        run_in_background(step, write_path=VAULT_DIR).then(self.on_history_step, self.on_vault_error)
+
+    def on_history_step(self, changed):
+        self.set_busy(False)
+        if changed:
+            self.vault_watcher.check()
+        else:
+            self.status_label.setText("Nothing to undo or redo.")
 
     def close_vault_viewer(self):
         if self.parent() and hasattr(self.parent(), "show_main_app_screen"):
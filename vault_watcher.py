@@ -0,0 +1,161 @@
+import os
+import json
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+import logic
+from vault_tasks import run_in_background
+
+# Editors and scripts often write in several steps; wait for them to settle.
+DEBOUNCE_MS = 150
+
+
+def record_digest(entry):
+    # The snapshot keeps a digest per record rather than a second copy of it;
+    # the screen already holds the decrypted entries.
+    # Nested values (blind-index tokens) are hashed through their JSON form.
+    return hash(tuple(
+        (key, value if isinstance(value, str) else json.dumps(value, sort_keys=True))
+        for key, value in sorted(entry.items())
+    ))
+
+
+class VaultWatcher(QObject):
+    """Watches the mounted vault shards and reports what changed, keyed by record id.
+
+    Only shards whose files changed are re-read, and only inserted and
+    updated records are decrypted, so applying an outside edit costs in
+    proportion to the edit rather than the whole vault. The reading and
+    decrypting run on the thread pool, queued behind writes to the vault
+    directory; check() itself only compares file stats.
+    """
+
+    changes_ready = Signal(list, list, list)   # inserted entries, updated entries, deleted ids
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or logic.get_store()
+        self.directory = os.path.abspath(self.store.directory)
+        self._snapshot = {}     # mounted vault -> {id: digest of the stored record}
+        self._stats = {}        # mounted vault -> shard file stat
+        self.follow_new = False # pick up shards created after the snapshot
+        self.paused = False     # set while the screen is still streaming a shard in
+        self._checking = False  # a read is on the thread pool
+        self._recheck = False   # check() was called meanwhile; run again when it lands
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._schedule)
+        # Directories are watched too: atomic replaces drop the file watch,
+        # and the shard directory may not exist until the first save.
+        self._watcher.directoryChanged.connect(self._schedule)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.check)
+        self._rewatch()
+
+    def _rewatch(self):
+        watched_dirs = self._watcher.directories()
+        for directory in (os.path.dirname(self.directory), self.directory):
+            if os.path.isdir(directory) and directory not in watched_dirs:
+                self._watcher.addPath(directory)
+        watched_files = self._watcher.files()
+        for vault in self._snapshot:
+            path = self.store.shard_path(vault)
+            if path and os.path.exists(path) and os.path.abspath(path) not in watched_files:
+                self._watcher.addPath(os.path.abspath(path))
+
+    def _schedule(self, *args):
+        self._debounce.start()
+
+    def mounted(self):
+        return set(self._snapshot)
+
+    def set_snapshot(self, raw_data, vaults=None):
+        """Records the stored state the screen is showing; vaults defaults to every shard."""
+        self._snapshot, self._stats = {}, {}
+        self.follow_new = vaults is None
+        self.mount(raw_data, self.store.names() if vaults is None else vaults)
+
+    def mount(self, raw_data, vaults):
+        """Adds shards the screen has just loaded to the watched set."""
+        stats = self.store.shard_stats()
+        for vault in vaults:
+            self._snapshot[vault] = {}
+            self._stats[vault] = stats.get(vault)
+        for entry in raw_data:
+            self._snapshot.setdefault(entry.get("vault"), {})[logic.entry_id(entry)] = record_digest(entry)
+        self._rewatch()
+
+    def discard(self, entry_ids):
+        """Drops records the screen removed itself, so the next diff doesn't report them."""
+        for records in self._snapshot.values():
+            for target_id in entry_ids:
+                records.pop(target_id, None)
+
+    def check(self):
+        if self.paused:
+            return
+        if self._checking:
+            self._recheck = True
+            return
+        self._rewatch()
+        stats = self.store.shard_stats()
+        if self.follow_new:
+            for vault in stats.keys() - self._snapshot.keys():
+                self._snapshot[vault], self._stats[vault] = {}, None
+        changed = [vault for vault in self._snapshot if stats.get(vault) != self._stats.get(vault)]
+        if not changed:
+            return
+
+        previous = {}
+        for vault in changed:
+            previous.update(self._snapshot[vault])
+        self._checking = True
+        run_in_background(self._read_changes, changed, previous, write_path=self.store.directory).then(
+            lambda result: self._apply(changed, stats, result),
+            self._failed
+        )
+
+    def _read_changes(self, changed, previous):
+        # Runs on a pool thread: nothing here touches the watcher's own state.
+        snapshots, digests, current = {}, {}, {}
+        for vault in changed:
+            records = {logic.entry_id(entry): entry for entry in self.store.stream(vault)}
+            snapshots[vault] = {target_id: record_digest(entry) for target_id, entry in records.items()}
+            digests.update(snapshots[vault])
+            current.update(records)
+        # A record moved between two changed shards shows up as an update.
+        inserted = [i for i in current if i not in previous]
+        updated = [i for i in current if i in previous and digests[i] != previous[i]]
+        deleted = [i for i in previous if i not in current]
+
+        def decrypted(ids):
+            entries = logic.decrypt_entries([current[i] for i in ids])
+            for target_id, entry in zip(ids, entries):
+                entry["id"] = target_id
+            return entries
+
+        return snapshots, decrypted(inserted), decrypted(updated), deleted
+
+    def _apply(self, changed, stats, result):
+        self._checking = False
+        if self.paused:
+            # A shard started loading meanwhile; its load ends with another check.
+            self._recheck = False
+            return
+        snapshots, inserted, updated, deleted = result
+        for vault in changed:
+            if vault in self._snapshot:
+                self._stats[vault] = stats.get(vault)
+                self._snapshot[vault] = snapshots[vault]
+        if inserted or updated or deleted:
+            self.changes_ready.emit(inserted, updated, deleted)
+        self._finish_check()
+
+    def _failed(self, error):
+        self._checking = False
+        print(f"[WARN] Could not read vault changes: {error}")
+        self._finish_check()
+
+    def _finish_check(self):
+        if self._recheck:
+            self._recheck = False
+            self.check()